@@ -0,0 +1,21 @@
+"""Выбор кешей, общих для всех процессов приложения."""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Кеши, содержимое которых видно только в одном процессе.
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def get_shared_cache(alias='default'):
+    """
+    Кеш alias, если он общий для всех процессов, иначе None.
+
+    Запись или сброс значения в кеше в памяти процесса не видны
+    остальным процессам gunicorn, поэтому такой кеш нельзя
+    использовать для данных, которые должны сбрасываться везде сразу.
+    """
+    cache = caches[alias]
+    if isinstance(cache, PROCESS_LOCAL_BACKENDS):
+        return None
+    return cache
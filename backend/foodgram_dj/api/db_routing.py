@@ -0,0 +1,99 @@
+"""
+Направление читающих запросов API на реплики БД.
+
+Представления с ReplicaReadMixin читают данные безопасных (GET, HEAD,
+OPTIONS) запросов с одной из реплик из DATABASE_REPLICAS. После
+изменяющего запроса пользователя его чтения в течение
+REPLICA_STICKY_SECONDS идут в основную БД, чтобы он сразу видел свои
+изменения, даже если реплика отстает.
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+# Разрешено ли в текущем запросе читать с реплики.
+use_replica = ContextVar('use_replica', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_cache_key(user_id):
+    return f'db_sticky:{user_id}'
+
+
+def mark_sticky(user):
+    """Направляет чтения пользователя в основную БД на время."""
+    cache.set(sticky_cache_key(user.pk), True,
+              getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+
+
+def is_sticky(user):
+    return (user.is_authenticated
+            and cache.get(sticky_cache_key(user.pk), False))
+
+
+class ReplicaRouter:
+    """Маршрутизатор БД: запись в default, чтение — с реплик."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and use_replica.get():
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Примесь к представлению, включающая чтение с реплик."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = use_replica.set(
+            request.method in permissions.SAFE_METHODS
+            and not is_sticky(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Запоминает пользователей, только что изменивших данные.
+
+    Срабатывает на любой успешный изменяющий запрос, поэтому учитывает
+    и представления без ReplicaReadMixin (подписки, djoser).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (get_replicas()
+           and request.method not in permissions.SAFE_METHODS
+           and response.status_code < 400
+           and user is not None
+           and user.is_authenticated):
+            mark_sticky(user)
+        return response
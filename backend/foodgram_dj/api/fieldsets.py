@@ -0,0 +1,78 @@
+"""
+Выборочный вывод полей (sparse fieldsets) для сериализаторов API.
+
+Параметр запроса ?fields=id,name,... оставляет в ответе только
+перечисленные поля. Вложенные объекты из Meta.expandable_fields при
+этом выводятся первичным ключом, если они не указаны в ?expand=.
+Без параметра fields ответ не меняется.
+"""
+from rest_framework import permissions, serializers
+
+
+def parse_list_param(request, name):
+    """Множество значений параметра запроса через запятую или None."""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def get_requested_fields(request):
+    """Поля, запрошенные через ?fields=, или None, если нужны все."""
+    return parse_list_param(request, 'fields')
+
+
+def get_expanded_fields(request):
+    """Вложенные объекты, запрошенные через ?expand=."""
+    return parse_list_param(request, 'expand') or set()
+
+
+def is_field_requested(request, name):
+    """Нужно ли выводить поле name в ответе на запрос."""
+    fields = get_requested_fields(request)
+    return fields is None or name in fields
+
+
+def is_field_expanded(request, name):
+    """Нужно ли выводить вложенный объект name полностью."""
+    fields = get_requested_fields(request)
+    return fields is None or (
+        name in fields and name in get_expanded_fields(request))
+
+
+class SparseFieldsetMixin:
+    """
+    Примесь к сериализатору, выводящая только запрошенные поля.
+
+    Применяется только к корневому сериализатору ответа, вложенные
+    сериализаторы выводятся как обычно. Поля, которые не запрошены,
+    удаляются до сериализации, поэтому их методы не вызываются.
+    """
+
+    def is_root_serializer(self):
+        parent = self.parent
+        return parent is None or (
+            isinstance(parent, serializers.ListSerializer)
+            and parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_root_serializer():
+            return fields
+        request = self.context.get('request')
+        requested = get_requested_fields(request)
+        if requested is None:
+            return fields
+
+        expanded = get_expanded_fields(request)
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            if name not in requested:
+                del fields[name]
+            elif name in expandable and name not in expanded:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True)
+        return fields
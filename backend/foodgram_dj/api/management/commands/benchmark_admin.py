@@ -0,0 +1,129 @@
+"""Команда для замера скорости списков в админ-зоне."""
+import random
+import time
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorites, Ingredient, Recipe, ShoppingCart
+
+User = get_user_model()
+
+# Префикс имен сгенерированных пользователей.
+PREFIX = 'bench_'
+
+
+class Command(BaseCommand):
+    """
+    Генерирует большой набор данных и выводит время отрисовки списков.
+
+    Для каждой модели админ-зоны выводится время отрисовки первой
+    страницы списка, страницы с поиском и число SQL-запросов.
+    Сгенерированные пользователи имеют имена с префиксом bench_ и
+    удаляются вместе со своими данными параметром --clear. Счетчики
+    пользователей при генерации не обновляются.
+    """
+
+    help = 'Замеряет скорость списков админ-зоны на больших данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10000,
+            help='Сколько пользователей сгенерировать.')
+        parser.add_argument(
+            '--recipes', type=int, default=100000,
+            help='Сколько рецептов сгенерировать.')
+        parser.add_argument(
+            '--relations', type=int, default=1000000,
+            help='Сколько записей избранного и корзин сгенерировать.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Размер пачки при вставке.')
+        parser.add_argument(
+            '--no-generate', action='store_true',
+            help='Не генерировать данные, только замерить.')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить сгенерированные данные и выйти.')
+
+    def bulk_insert(self, model, objects, batch_size):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == batch_size:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def generate(self, options):
+        batch_size = options['batch_size']
+        start = User.objects.filter(
+            username__startswith=PREFIX).count()
+        self.bulk_insert(User, (
+            User(username=f'{PREFIX}{n}', email=f'{PREFIX}{n}@example.com',
+                 first_name='Bench', last_name=str(n))
+            for n in range(start, start + options['users'])
+        ), batch_size)
+        user_ids = list(User.objects.filter(
+            username__startswith=PREFIX).values_list('pk', flat=True))
+        self.stdout.write(f'Пользователей: {len(user_ids)}')
+
+        self.bulk_insert(Recipe, (
+            Recipe(name=f'Рецепт {n}', text='Описание', cooking_time=10,
+                   image='recipes/images/bench.png',
+                   author_id=random.choice(user_ids))
+            for n in range(options['recipes'])
+        ), batch_size)
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=user_ids).values_list('pk', flat=True))
+        self.stdout.write(f'Рецептов: {len(recipe_ids)}')
+
+        for model in (Favorites, ShoppingCart):
+            self.bulk_insert(model, (
+                model(user_id=random.choice(user_ids),
+                      recipe_id=random.choice(recipe_ids))
+                for _ in range(options['relations'])
+            ), batch_size)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{model.objects.count()}')
+
+    def measure(self, model, superuser, params):
+        """Время отрисовки списка модели и число запросов."""
+        request = RequestFactory().get('/', params)
+        request.user = superuser
+        model_admin = admin.site._registry[model]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = model_admin.changelist_view(request)
+            response.render()
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries.captured_queries)
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            User.objects.filter(username__startswith=PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS('Данные удалены.'))
+            return
+        if not options['no_generate']:
+            self.generate(options)
+
+        superuser = User(username=f'{PREFIX}admin', is_staff=True,
+                         is_superuser=True, is_active=True)
+        searches = {
+            User: 'bench_1',
+            Recipe: 'Рецепт 1',
+            Ingredient: 'а',
+            Favorites: 'bench_1',
+            ShoppingCart: 'bench_1',
+        }
+        for model, search in searches.items():
+            for params in ({}, {'q': search}):
+                elapsed, queries = self.measure(model, superuser, params)
+                self.stdout.write(
+                    f'{model.__name__:<14}'
+                    f'{"поиск" if params else "список":<8}'
+                    f'{elapsed * 1000:>9.1f} мс  запросов: {queries}')
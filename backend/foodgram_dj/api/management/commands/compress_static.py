@@ -0,0 +1,79 @@
+"""Команда для предварительного сжатия статических файлов."""
+import gzip
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Расширения текстовых файлов, которые имеет смысл сжимать.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.html', '.js', '.json', '.map',
+                           '.svg', '.txt', '.xml', '.ico', '.otf')
+
+
+class Command(BaseCommand):
+    """
+    Создает рядом со статическими файлами сжатые копии .gz и .br.
+
+    nginx отдает их готовыми (gzip_static) и не сжимает файлы при
+    каждом запросе. Уже сжатые копии, которые новее исходного файла,
+    не пересоздаются.
+    """
+
+    help = 'Создает .gz и .br копии статических файлов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Каталоги для обработки (по умолчанию STATIC_ROOT).')
+        parser.add_argument(
+            '--min-size', type=int,
+            default=getattr(settings, 'COMPRESSION_MIN_SIZE', 1024),
+            help='Не сжимать файлы меньше указанного размера в байтах.')
+
+    def get_compressors(self):
+        compressors = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            compressors.append(
+                ('.br', lambda data: brotli.compress(data, quality=11)))
+        return compressors
+
+    def compress_file(self, path, compressors):
+        """Сжимает файл; возвращает количество созданных копий."""
+        created = 0
+        data = None
+        mtime = os.path.getmtime(path)
+        for suffix, compress in compressors:
+            target = path + suffix
+            if (os.path.exists(target)
+               and os.path.getmtime(target) >= mtime):
+                continue
+            if data is None:
+                with open(path, 'rb') as file:
+                    data = file.read()
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            with open(target, 'wb') as file:
+                file.write(compressed)
+            created += 1
+        return created
+
+    def handle(self, *args, **options):
+        compressors = self.get_compressors()
+        if brotli is None:
+            self.stdout.write('Пакет brotli не установлен, '
+                              'создаются только .gz файлы.')
+        created = 0
+        for root in options['paths'] or [settings.STATIC_ROOT]:
+            for dirpath, dirnames, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    if (filename.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+                       and os.path.getsize(path) >= options['min_size']):
+                        created += self.compress_file(path, compressors)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано сжатых файлов: {created}'))
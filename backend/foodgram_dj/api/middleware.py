@@ -0,0 +1,50 @@
+"""Промежуточные слои (middleware) для ответов API."""
+import re
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_br = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Сжатие ответов brotli или gzip.
+
+    Ответы короче COMPRESSION_MIN_SIZE байт не сжимаются. Brotli
+    используется, если клиент его поддерживает и установлен пакет
+    brotli; иначе ответ сжимается gzip, как в GZipMiddleware.
+    """
+
+    min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+    # Уровень 5 сжимает лучше gzip при сопоставимой скорости.
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return super().process_response(request, response)
+        if (len(response.content) < self.min_size
+           or response.has_header('Content-Encoding')):
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is None or not re_accepts_br.search(accept_encoding):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content,
+                                     quality=self.brotli_quality)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
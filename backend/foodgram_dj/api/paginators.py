@@ -0,0 +1,41 @@
+"""Пагинаторы для больших таблиц."""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк таблица считается точным COUNT(*).
+ESTIMATE_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, берущий число строк таблицы из статистики PostgreSQL.
+
+    Точный COUNT(*) по большой таблице читает ее целиком. Для списка
+    без фильтров число строк берется из pg_class.reltuples (обновляется
+    VACUUM/ANALYZE); для отфильтрованных списков, небольших таблиц и
+    других СУБД выполняется обычный COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        estimate = self.get_estimate(queryset)
+        if estimate is None or estimate < ESTIMATE_THRESHOLD:
+            return super().count
+        return estimate
+
+    def get_estimate(self, queryset):
+        """Оценка числа строк или None, если ее нельзя использовать."""
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,61 @@
+"""Рендереры ответов API."""
+import re
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Число с порядком в выводе orjson: 1e16, 1.5e-5. Стандартный json
+# пишет их как 1e+16 и 1.5e-05. Совпадение внутри строки лишь
+# переключает ответ на стандартный рендерер.
+EXPONENT_RE = re.compile(rb'\de-?\d')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на основе orjson.
+
+    Результат совпадает с JSONRenderer байт в байт: даты, Decimal и
+    ленивые строки перевода преобразуются тем же кодировщиком DRF, а
+    данные, которые orjson выводит иначе или не умеет выводить (числа
+    с порядком, ключи словарей не строки, целые больше 64 бит),
+    отрисовываются стандартным рендерером. Исключение — NaN и
+    бесконечности: orjson выводит их как null, а JSONRenderer при
+    STRICT_JSON отказывается их выводить; в данных API их нет.
+
+    Стандартный рендерер используется также без orjson, для ответов
+    с отступами (browsable API) и при настройках UNICODE_JSON,
+    COMPACT_JSON или STRICT_JSON, отличных от значений по умолчанию.
+    """
+
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None
+                or self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type or '',
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            ret = None
+        if ret is None or EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Как и JSONRenderer, экранируем символы, недопустимые в JS.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
@@ -0,0 +1,95 @@
+"""
+Чтение с реплик БД и привязка к основной БД после записи.
+
+Остальные тесты проекта обращаются только к default, поэтому эти
+тесты запускаются отдельно, с репликой-зеркалом default:
+DB_REPLICA_HOSTS=$DB_HOST python manage.py test api.tests.test_db_routing
+"""
+import time
+from contextlib import ExitStack
+from unittest import skipUnless
+from django.conf import settings
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.tests.utils import create_recipes, create_user
+from recipes.models import Ingredient
+
+# Время привязки к default в тестах: столько ждет проверка истечения.
+STICKY_SECONDS = 1
+
+
+@skipUnless(settings.DATABASE_REPLICAS,
+            'нужна реплика БД (DB_REPLICA_HOSTS или DATABASE_REPLICAS)')
+@override_settings(REPLICA_STICKY_SECONDS=STICKY_SECONDS)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Маршрутизация запросов API между default и репликами."""
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = create_user(1)
+        self.author = create_user(2)
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name='мука', measurement_unit='г'),
+        ])
+        [self.recipe] = create_recipes(self.author, 1, ingredients)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, url):
+        """Ответ и запросы к default и ко всем репликам."""
+        with ExitStack() as stack:
+            default = stack.enter_context(
+                CaptureQueriesContext(connections['default']))
+            replicas = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in settings.DATABASE_REPLICAS
+            ]
+            response = getattr(self.client, method)(url)
+        return response, len(default), sum(map(len, replicas))
+
+    def assertReadsFrom(self, database, url):
+        response, default, replica = self.request('get', url)
+        self.assertEqual(response.status_code, 200)
+        if database == 'default':
+            self.assertEqual(replica, 0)
+            self.assertGreater(default, 0)
+        else:
+            self.assertEqual(default, 0)
+            self.assertGreater(replica, 0)
+
+    def test_safe_reads_use_replica(self):
+        for url in ('/api/ingredients/', '/api/recipes/',
+                    f'/api/recipes/{self.recipe.pk}/', '/api/users/',
+                    f'/api/users/{self.author.pk}/',
+                    '/api/users/subscriptions/', '/api/meal-plan/'):
+            with self.subTest(url=url):
+                self.assertReadsFrom('replica', url)
+
+    def test_writes_use_default(self):
+        for url in (f'/api/recipes/{self.recipe.pk}/favorite/',
+                    f'/api/users/{self.author.pk}/subscribe/'):
+            with self.subTest(url=url):
+                response, default, replica = self.request('post', url)
+                self.assertEqual(response.status_code, 201)
+                self.assertGreater(default, 0)
+                self.assertEqual(replica, 0)
+
+    def test_reads_stick_to_default_after_write(self):
+        response, _, _ = self.request(
+            'post', f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertReadsFrom('default', '/api/recipes/')
+        # Привязка касается только изменившего данные пользователя.
+        self.client.force_authenticate(self.author)
+        self.assertReadsFrom('replica', '/api/recipes/')
+        self.client.force_authenticate(self.user)
+        time.sleep(STICKY_SECONDS + 0.5)
+        self.assertReadsFrom('replica', '/api/recipes/')
+
+    def test_failed_write_does_not_stick(self):
+        response, _, _ = self.request('post', '/api/recipes/0/favorite/')
+        self.assertEqual(response.status_code, 404)
+        self.assertReadsFrom('replica', '/api/recipes/')
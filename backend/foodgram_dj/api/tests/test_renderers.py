@@ -0,0 +1,111 @@
+"""Совпадение вывода FastJSONRenderer с JSONRenderer."""
+import datetime
+import uuid
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from api.renderers import FastJSONRenderer
+from api.tests.utils import (BenchmarkMixin, benchmark, create_recipes,
+                             create_user)
+from recipes.models import Ingredient
+from recipes.serializers import RecipeSerializer
+
+
+class RendererParityMixin:
+
+    def assertSameJSON(self, data):
+        self.assertEqual(FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+
+
+class FastJSONRendererTest(RendererParityMixin, SimpleTestCase):
+    """Значения, которые orjson по умолчанию выводит иначе."""
+
+    def test_floats(self):
+        self.assertSameJSON({'values': [
+            0.1, 100.0, 1e15, 1e16, 1.5e-05, -2.5e100, 1e-4,
+            Decimal('12.50'), Decimal('1E+20'),
+        ]})
+
+    def test_non_string_keys(self):
+        self.assertSameJSON({0: ['Ошибка.'], 1: {'id': ['Ошибка.']}})
+
+    def test_big_integers(self):
+        self.assertSameJSON({'id': 2 ** 70})
+
+    def test_special_types(self):
+        self.assertSameJSON({
+            'created_at': datetime.datetime(
+                2024, 1, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 1, 1),
+            'uuid': uuid.UUID(int=5),
+            'lazy': _('Рецепт'),
+            'tuple': (1, 2),
+            'text': 'строка с разделителями 1e5',
+        })
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+
+class APIRendererParityTest(RendererParityMixin, TestCase):
+    """Ответы API отрисовываются так же, как стандартным рендерером."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name='мука', measurement_unit='г'),
+            Ingredient(name='молоко', measurement_unit='мл'),
+        ])
+        create_recipes(cls.user, 3, ingredients)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertSameContent(self, response):
+        self.assertEqual(response.content,
+                         JSONRenderer().render(response.data))
+
+    def test_list_error_keyed_by_index(self):
+        response = self.client.post('/api/recipes/bulk_favorite/',
+                                    {'recipes': ['abc', 1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertSameContent(response)
+
+    def test_validation_error(self):
+        response = self.client.post('/api/recipes/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertSameContent(response)
+
+    def test_recipe_page(self):
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertSameContent(response)
+
+
+@benchmark
+class RendererBenchmark(BenchmarkMixin, TestCase):
+    """Время отрисовки страницы из 100 рецептов."""
+
+    def test_render_recipe_page(self):
+        user = create_user(1)
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(10)
+        ])
+        recipes = create_recipes(user, 100, ingredients)
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        data = RecipeSerializer(recipes, many=True,
+                                context={'request': request}).data
+        standard = self.measure('JSONRenderer, 100 рецептов',
+                                lambda: JSONRenderer().render(data), 200)
+        fast = self.measure('FastJSONRenderer, 100 рецептов',
+                            lambda: FastJSONRenderer().render(data), 200)
+        self.assertLess(fast, standard)
@@ -0,0 +1,109 @@
+"""Ограничение частоты запросов по алгоритму token bucket."""
+import os
+import threading
+from types import SimpleNamespace
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from api.throttling import ScopedTokenBucketThrottle, get_token_bucket_script
+
+RATE = 5
+
+REST_FRAMEWORK = {
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+        'test': f'{RATE}/min',
+        'ingredients': '2/min',
+    },
+}
+
+
+@override_settings(REST_FRAMEWORK=REST_FRAMEWORK)
+class TokenBucketThrottleTest(SimpleTestCase):
+    """Емкость корзины, ожидание и одновременные запросы клиента."""
+
+    view = SimpleNamespace(throttle_scope='test')
+
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE].clear()
+
+    def take_token(self, address='10.0.0.1'):
+        throttle = ScopedTokenBucketThrottle()
+        request = SimpleNamespace(user=AnonymousUser(),
+                                  META={'REMOTE_ADDR': address})
+        return throttle.allow_request(request, self.view), throttle.wait()
+
+    def test_capacity_then_wait(self):
+        for _ in range(RATE):
+            self.assertEqual(self.take_token(), (True, None))
+        allowed, wait = self.take_token()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 60 / RATE, delta=0.5)
+        self.assertTrue(self.take_token('10.0.0.2')[0])
+
+    def test_parallel_requests_do_not_overadmit(self):
+        barrier = threading.Barrier(20)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(self.take_token()[0])
+
+        workers = [threading.Thread(target=request) for _ in range(20)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(results.count(True), RATE)
+
+
+@skipUnless(os.getenv('REDIS_URL'), 'нужен REDIS_URL')
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': os.getenv('REDIS_URL'),
+}})
+class RedisTokenBucketThrottleTest(TokenBucketThrottleTest):
+    """Те же проверки для корзин в Redis (скрипт Lua)."""
+
+
+class TokenBucketScriptTest(SimpleTestCase):
+    """Скрипт Lua регистрируется один раз на процесс и кеш."""
+
+    def test_script_cached_per_alias(self):
+        # Регистрация скрипта не обращается к серверу.
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://redis-1:6379/1,redis://redis-2:6379/1',
+            'OPTIONS': {'serializer': 'x.Serializer', 'socket_timeout': 2},
+        }}):
+            script = get_token_bucket_script('default')
+            self.assertIs(get_token_bucket_script('default'), script)
+            pool = script.registered_client.connection_pool
+            options = pool.connection_kwargs
+            self.assertEqual((options['host'], options['db'],
+                              options['socket_timeout']),
+                             ('redis-1', 1, 2))
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://redis-3:6379/0',
+        }}):
+            self.assertIsNot(get_token_bucket_script('default'), script)
+
+
+@override_settings(REST_FRAMEWORK=REST_FRAMEWORK)
+class RetryAfterTest(TestCase):
+    """Ответ 429 сообщает, когда можно повторить запрос."""
+
+    def test_retry_after_header(self):
+        caches[settings.THROTTLE_CACHE].clear()
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(
+                client.get('/api/ingredients/').status_code, 200)
+        response = client.get('/api/ingredients/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
@@ -0,0 +1,112 @@
+"""Общие средства для тестов приложений проекта."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from recipes.models import IngredientRecipe, Recipe
+
+User = get_user_model()
+
+
+def create_user(number):
+    """Пользователь с именем cook<number>."""
+    return User.objects.create(
+        username=f'cook{number}', email=f'cook{number}@example.com',
+        first_name='Иван', last_name='Иванов')
+
+
+def create_recipes(author, count, ingredients=()):
+    """
+    Создает count рецептов автора со всеми ингредиентами ingredients.
+
+    Рецепты создаются через bulk_create, без картинок на диске,
+    сигналов и итогов по ингредиентам.
+    """
+    recipes = Recipe.objects.bulk_create([
+        Recipe(author=author, name=f'Рецепт {number}',
+               text='Смешать и запечь.', cooking_time=10 + number,
+               image=f'recipes/images/{number}.png')
+        for number in range(count)
+    ])
+    IngredientRecipe.objects.bulk_create([
+        IngredientRecipe(recipe=recipe, ingredient=ingredient,
+                         amount=100 + index)
+        for recipe in recipes
+        for index, ingredient in enumerate(ingredients)
+    ])
+    return recipes
+
+
+# Замеры скорости долгие и зависят от машины, поэтому запускаются
+# только с переменной окружения BENCHMARK=1.
+benchmark = skipUnless(os.getenv('BENCHMARK'),
+                       'замеры скорости включаются BENCHMARK=1')
+
+
+class QueryPlanMixin:
+    """Проверки плана выполнения запросов."""
+
+    def get_plan(self, queryset):
+        """План выполнения запроса queryset в виде текста."""
+        if connection.vendor == 'postgresql':
+            # В тестовой базе таблицы почти пустые, и планировщик
+            # предпочитает последовательное чтение и сортировку любому
+            # индексу. SET LOCAL действует до отката транзакции теста.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Проверяет, что запрос читает таблицу по индексу index_name."""
+        plan = self.get_plan(queryset)
+        self.assertIn(index_name, plan, f'План без {index_name}:\n{plan}')
+
+
+class MediaTestMixin:
+    """Отдельный каталог MEDIA_ROOT на время теста."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def stored_files(self, upload_dir):
+        """Имена всех файлов в каталоге upload_dir хранилища."""
+        root = os.path.join(settings.MEDIA_ROOT, upload_dir)
+        return {
+            os.path.relpath(os.path.join(dirpath, filename),
+                            settings.MEDIA_ROOT).replace(os.sep, '/')
+            for dirpath, _, filenames in os.walk(root)
+            for filename in filenames
+        }
+
+
+class BenchmarkMixin:
+    """Замер скорости операции в тестах, отмеченных benchmark."""
+
+    def measure(self, label, func, number):
+        """
+        Выполняет func number раз и выводит число операций в секунду.
+
+        Возвращает среднее время одной операции в секундах.
+        """
+        func()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - started) / number
+        sys.stderr.write(f'\n{label}: {1 / elapsed:,.0f} оп/с, '
+                         f'{elapsed * 1e6:,.1f} мкс на операцию\n')
+        return elapsed
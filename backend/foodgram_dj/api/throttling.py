@@ -0,0 +1,165 @@
+"""Ограничение частоты запросов к API."""
+import functools
+import threading
+import time
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Кеш процесса, используемый, если общий кеш недоступен.
+fallback_cache = LocMemCache('throttle-fallback', {})
+
+# Корзины в кешах, кроме Redis, читаются и записываются под этой
+# блокировкой; атомарность в таком случае есть только внутри процесса.
+local_lock = threading.Lock()
+
+# Пополнение корзины и списание токена одной командой Redis. Время
+# берется с сервера Redis, чтобы не зависеть от часов разных машин.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity,
+                  tokens + math.max(0, now - updated) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens),
+           'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(tokens)}
+"""
+
+# Параметры OPTIONS кеша Redis, которые понимает только клиент Django.
+DJANGO_REDIS_OPTIONS = ('serializer', 'pool_class', 'parser_class')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@functools.cache
+def get_token_bucket_script(alias):
+    """
+    Скрипт корзины для кеша Redis alias, один на процесс.
+
+    У кеша Django нет открытого способа выполнить скрипт, поэтому
+    для сервера из LOCATION создается свой клиент redis-py. Скрипт
+    регистрируется один раз и вызывается через EVALSHA.
+    """
+    config = settings.CACHES[alias]
+    location = config['LOCATION']
+    if isinstance(location, str):
+        location = location.split(',')
+    options = {name: value
+               for name, value in config.get('OPTIONS', {}).items()
+               if name not in DJANGO_REDIS_OPTIONS}
+    # Запись идет на первый сервер, как и в RedisCache.
+    client = redis.Redis.from_url(location[0], **options)
+    return client.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+@receiver(setting_changed)
+def reset_token_bucket_scripts(setting, **kwargs):
+    if setting == 'CACHES':
+        get_token_bucket_script.cache_clear()
+
+
+def parse_rate(rate):
+    """
+    Разбирает частоту вида '60/min' в пару (емкость, период в секундах).
+    """
+    capacity, period = rate.split('/')
+    return int(capacity), PERIODS[period[0]]
+
+
+class ScopedTokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Применяется к представлениям и действиям с атрибутом
+    throttle_scope; частота берется из DEFAULT_THROTTLE_RATES.
+    Корзина вмещает столько запросов, сколько разрешено за период,
+    и равномерно пополняется, поэтому короткие всплески допустимы,
+    а средняя частота ограничена. Состояние хранится в общем кеше
+    (THROTTLE_CACHE), при его недоступности — в памяти процесса.
+    В Redis корзина проверяется и обновляется атомарно скриптом Lua,
+    так что одновременные запросы клиента не получат лишних токенов.
+    """
+
+    cache_alias = getattr(settings, 'THROTTLE_CACHE', 'default')
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_cache_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return f'throttle_bucket:{scope}:{ident}'
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        capacity, period = parse_rate(rate)
+        key = self.get_cache_key(request, scope)
+        try:
+            return self.take_token(self.cache_alias, key, capacity, period)
+        except Exception:
+            return self.take_token(None, key, capacity, period)
+
+    def take_token(self, alias, key, capacity, period):
+        """
+        Забирает из корзины один токен, если он есть.
+
+        alias — кеш с корзинами; None означает кеш процесса.
+        """
+        refill_rate = capacity / period
+        cache = fallback_cache if alias is None else caches[alias]
+        if isinstance(cache, RedisCache):
+            allowed, tokens = self.take_token_redis(
+                alias, cache.make_and_validate_key(key),
+                capacity, refill_rate, period)
+        else:
+            allowed, tokens = self.take_token_locked(
+                cache, key, capacity, refill_rate, period)
+        if allowed:
+            self.wait_seconds = None
+        else:
+            self.wait_seconds = (1 - tokens) / refill_rate
+        return allowed
+
+    def take_token_redis(self, alias, key, capacity, refill_rate, period):
+        script = get_token_bucket_script(alias)
+        allowed, tokens = script(keys=[key],
+                                 args=[capacity, refill_rate, period])
+        return bool(allowed), float(tokens)
+
+    def take_token_locked(self, cache, key, capacity, refill_rate, period):
+        with local_lock:
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Через period корзина заполнится полностью, хранить дольше
+            # незачем.
+            cache.set(key, (tokens, now), period)
+        return allowed, tokens
+
+    def wait(self):
+        return self.wait_seconds
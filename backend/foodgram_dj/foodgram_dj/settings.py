@@ -46,25 +46,27 @@ INSTALLED_APPS = [
     'userprofile.apps.UserProfileConfig',
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
-    'django_short_url',
     'django_filters',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
 ]
 
-DJANGO_SHORT_URL_REDIRECT_URL = ''
-
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.db_routing.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Ответы короче этого размера (в байтах) не сжимаются.
+COMPRESSION_MIN_SIZE = 1024
+
 ROOT_URLCONF = 'foodgram_dj.urls'
 
 TEMPLATES = [
@@ -102,6 +104,47 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: DB_REPLICA_HOSTS="host1,host2" — копии
+# default с другим HOST. Безопасные запросы к API читают с них
+# (см. api.db_routing). Реплику можно объявить и напрямую: добавить
+# псевдоним в DATABASES (например, второй SQLite с
+# 'TEST': {'MIRROR': 'default'}) и перечислить его в DATABASE_REPLICAS.
+# В тестах реплики — зеркала default.
+DATABASE_REPLICAS = []
+REPLICA_HOSTS = [host.strip()
+                 for host in os.getenv('DB_REPLICA_HOSTS', '').split(',')
+                 if host.strip()]
+for number, host in enumerate(REPLICA_HOSTS, 1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+
+# Сколько секунд после изменения данных пользователь читает из default.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
+# Общий для всех процессов кеш (токены, ограничение частоты запросов,
+# привязка чтений к основной БД): REDIS_URL="redis://host:6379/0".
+# Без него каждый процесс использует собственный кеш в памяти.
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -144,6 +187,16 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загруженные картинки хранятся по хешу содержимого без дублей.
+STORAGES = {
+    'default': {
+        'BACKEND': 'image64conv.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -156,12 +209,52 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'userprofile.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 
+    # Частоты задаются для throttle_scope представлений и действий.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ScopedTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'ingredients': os.getenv('THROTTLE_INGREDIENTS', '120/min'),
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', '20/min'),
+        'toggles': os.getenv('THROTTLE_TOGGLES', '60/min'),
+    },
+
+}
+
+# Кеш для хранения состояния ограничения частоты запросов. Без
+# REDIS_URL это кеш в памяти процесса, и ограничения действуют
+# отдельно в каждом процессе gunicorn.
+THROTTLE_CACHE = 'default'
+
+# Кеширование пользователя при аутентификации по токену.
+TOKEN_AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 1024,
+    'LOCAL_TIMEOUT': 5,
+    'SHARED_TIMEOUT': 300,
+}
+
+# Популярность рецептов (см. recipes.trending, команда update_trending).
+TRENDING = {
+    'HALF_LIFE_HOURS': int(os.getenv('TRENDING_HALF_LIFE_HOURS', 24)),
+    'FAVORITE_WEIGHT': 1.0,
+    'CART_WEIGHT': 0.5,
 }
 
 DJOSER = {
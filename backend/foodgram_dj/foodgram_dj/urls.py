@@ -15,9 +15,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
+from recipes.views import short_link_redirect
 
 
 urlpatterns = [
     path('api/', include('api.urls')),
     path('admin/', admin.site.urls),
+    path('s/<str:code>', short_link_redirect, name='short_link_redirect'),
 ]
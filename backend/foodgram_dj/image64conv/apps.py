@@ -1,7 +1,16 @@
+"""Настройка приложения image64conv."""
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class Image64ConvConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'image64conv'
     verbose_name = 'Конвертер изображений'
+
+    def ready(self):
+        """Удаление файлов из откаченных транзакций после запроса."""
+        from .cleanup import delete_rolled_back_files
+
+        request_finished.connect(delete_rolled_back_files,
+                                 dispatch_uid='delete_rolled_back_files')
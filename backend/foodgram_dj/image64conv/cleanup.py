@@ -0,0 +1,160 @@
+"""
+Учет ссылок на файлы изображений и удаление неиспользуемых.
+
+Модели регистрируют свои файловые поля через track_file_fields. Число
+записей, ссылающихся на файл, хранится в StoredFile и меняется в той
+же транзакции, что и сами записи. Файл, который заменили другим или
+чья запись удалена, удаляется из хранилища после фиксации транзакции,
+если счетчик ссылок на него равен нулю.
+
+Строка StoredFile блокируется и при загрузке файла (см.
+ContentAddressedStorage.save): пока транзакция, загрузившая файл, не
+завершена, удалить его нельзя, а если файл удалили раньше, загрузка
+запишет его заново.
+"""
+from collections import Counter
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save
+from .models import StoredFile
+
+# Отслеживаемые файловые поля: пары (модель, имя поля).
+tracked_fields = []
+
+
+def get_file_name(value):
+    """Имя файла из значения поля (строки, File или FieldFile)."""
+    return getattr(value, 'name', value) or ''
+
+
+def lock_file(name):
+    """
+    Блокирует строку StoredFile файла до конца текущей транзакции.
+
+    Строка создается, если ее еще нет. Вне транзакции блокировка
+    снимается сразу.
+    """
+    with transaction.atomic():
+        stored, _ = StoredFile.objects.select_for_update().get_or_create(
+            name=name)
+    return stored
+
+
+def change_references(names, delta):
+    """Изменяет число ссылок на delta за каждое вхождение файла в names."""
+    for name, count in Counter(names).items():
+        with transaction.atomic():
+            lock_file(name)
+            StoredFile.objects.filter(name=name).update(
+                references=Greatest(F('references') + delta * count, 0))
+
+
+def delete_unreferenced(storage, names):
+    """Удаляет из хранилища файлы, на которые нет ссылок в БД."""
+    for name in names:
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name).first()
+            if stored is not None and stored.references:
+                continue
+            # Файл удаляется под блокировкой: загрузка того же
+            # содержимого дождется ее и запишет файл заново.
+            storage.delete(name)
+            if stored is not None:
+                stored.delete()
+
+
+def delete_on_commit(storage, names, using=None):
+    """Откладывает удаление файлов до фиксации текущей транзакции."""
+    transaction.on_commit(
+        lambda: delete_unreferenced(storage, names), using=using)
+
+
+def delete_on_rollback(storage, names, using=None):
+    """
+    Удаляет файлы, если текущая транзакция будет отменена.
+
+    При откате Django не вызывает обработчиков, поэтому файлы
+    запоминаются в соединении, фиксация транзакции снимает их с учета,
+    а оставшиеся после ее завершения удаляет delete_rolled_back_files.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return
+    if not hasattr(connection, 'pending_files'):
+        connection.pending_files = {}
+    key = object()
+    connection.pending_files[key] = (storage, names)
+    transaction.on_commit(
+        lambda: connection.pending_files.pop(key, None), using=using)
+
+
+def delete_rolled_back_files(**kwargs):
+    """
+    Удаляет файлы из delete_on_rollback, чьи транзакции откатились.
+
+    Вызывается по окончании обработки запроса (сигнал
+    request_finished), когда транзакции запроса уже завершены.
+    """
+    for connection in connections.all(initialized_only=True):
+        pending = getattr(connection, 'pending_files', None)
+        if not pending or connection.in_atomic_block:
+            continue
+        connection.pending_files = {}
+        for storage, names in pending.values():
+            delete_unreferenced(storage, names)
+
+
+def track_file_fields(model, *field_names):
+    """
+    Включает учет ссылок и очистку файлов для указанных полей модели.
+
+    Исходные имена файлов запоминаются при загрузке объекта, поэтому
+    для определения замененных файлов не нужен дополнительный запрос.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    tracked_fields.extend((model, field.name) for field in fields)
+
+    def remember_files(sender, instance, **kwargs):
+        # Строкой значение бывает только у загруженных из БД объектов;
+        # отложенные поля и новые файлы пропускаются.
+        instance._original_files = {
+            field.name: instance.__dict__[field.attname]
+            for field in fields
+            if isinstance(instance.__dict__.get(field.attname), str)
+        }
+
+    def update_references(sender, instance, update_fields, using,
+                          **kwargs):
+        original = getattr(instance, '_original_files', {})
+        current = dict(original)
+        for field in fields:
+            if update_fields is not None and field.name not in update_fields:
+                continue
+            name = get_file_name(getattr(instance, field.attname))
+            current[field.name] = name
+            old_name = original.get(field.name)
+            if old_name == name:
+                continue
+            if name:
+                change_references([name], 1)
+            if old_name:
+                change_references([old_name], -1)
+                delete_on_commit(field.storage, [old_name], using=using)
+        instance._original_files = current
+
+    def delete_files(sender, instance, using, **kwargs):
+        for field in fields:
+            name = get_file_name(getattr(instance, field.attname))
+            if name:
+                change_references([name], -1)
+                delete_on_commit(field.storage, [name], using=using)
+
+    uid = f'{model._meta.label_lower}_file_cleanup'
+    post_init.connect(remember_files, sender=model,
+                      weak=False, dispatch_uid=uid)
+    post_save.connect(update_references, sender=model,
+                      weak=False, dispatch_uid=uid)
+    post_delete.connect(delete_files, sender=model,
+                        weak=False, dispatch_uid=uid)
@@ -0,0 +1,153 @@
+"""Команда для удаления файлов изображений, на которые нет ссылок в БД."""
+import json
+import os
+import time
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from image64conv.cleanup import lock_file, tracked_fields
+
+
+class Command(BaseCommand):
+    """
+    Сверяет файлы в MEDIA_ROOT со ссылками в БД и удаляет лишние.
+
+    Ссылки проверяются по самим таблицам, а не по счетчикам StoredFile,
+    поэтому команда находит и файлы, оставшиеся после изменений в обход
+    ORM.
+
+    Файлы обрабатываются пачками в порядке имен; после каждой пачки
+    сохраняется контрольная точка, поэтому прерванный запуск
+    продолжается с места остановки.
+    """
+
+    help = 'Удаляет изображения, на которые не ссылается ни одна запись.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество файлов, проверяемых одним запросом.')
+        parser.add_argument(
+            '--min-age', type=int, default=24,
+            help='Не трогать файлы моложе указанного числа часов.')
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.MEDIA_ROOT,
+                                 '.cleanup_media.json'),
+            help='Файл контрольной точки для продолжения работы.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать проверку заново, игнорируя контрольную точку.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести найденные файлы, ничего не удаляя.')
+
+    def get_upload_dirs(self):
+        """Каталоги, в которые загружаются отслеживаемые файлы."""
+        dirs = set()
+        for model, field_name in tracked_fields:
+            upload_to = model._meta.get_field(field_name).upload_to
+            if isinstance(upload_to, str):
+                dirs.add(upload_to.strip('/'))
+        return sorted(dirs)
+
+    def iter_files(self, after):
+        """Имена файлов в хранилище по порядку, начиная после after."""
+        names = []
+        for upload_dir in self.get_upload_dirs():
+            root = default_storage.path(upload_dir)
+            for dirpath, dirnames, filenames in os.walk(root):
+                rel_dir = os.path.relpath(dirpath, settings.MEDIA_ROOT)
+                for filename in filenames:
+                    names.append(
+                        os.path.join(rel_dir, filename).replace(os.sep, '/'))
+        return (name for name in sorted(names) if name > after)
+
+    def find_referenced(self, names):
+        """Имена из names, на которые ссылается хотя бы одна запись."""
+        referenced = set()
+        for model, field_name in tracked_fields:
+            referenced.update(
+                model._default_manager.filter(
+                    **{f'{field_name}__in': names}
+                ).values_list(field_name, flat=True)
+            )
+        return referenced
+
+    def load_checkpoint(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checkpoint(self, path, state):
+        with open(path, 'w') as file:
+            json.dump(state, file)
+
+    def process_batch(self, batch, min_mtime, dry_run):
+        """Удаляет файлы пачки без ссылок; возвращает их количество."""
+        deleted = 0
+        referenced = self.find_referenced(batch)
+        for name in batch:
+            if name in referenced:
+                continue
+            if os.path.getmtime(default_storage.path(name)) > min_mtime:
+                continue
+            if dry_run:
+                self.stdout.write(name)
+            elif not self.delete_if_unreferenced(name):
+                continue
+            deleted += 1
+        return deleted
+
+    def delete_if_unreferenced(self, name):
+        """
+        Удаляет файл, если на него по-прежнему нет ссылок.
+
+        Транзакция, загрузившая тот же файл, держит блокировку строки
+        StoredFile до своего завершения, поэтому ссылки проверяются
+        повторно уже под блокировкой.
+        """
+        with transaction.atomic():
+            stored = lock_file(name)
+            if self.find_referenced([name]):
+                return False
+            default_storage.delete(name)
+            stored.delete()
+        return True
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        state = {} if options['restart'] else self.load_checkpoint(checkpoint)
+        state.setdefault('last', '')
+        state.setdefault('checked', 0)
+        state.setdefault('deleted', 0)
+        if state['last']:
+            self.stdout.write(f'Продолжение после {state["last"]}')
+
+        min_mtime = time.time() - options['min_age'] * 3600
+        batch = []
+        for name in self.iter_files(state['last']):
+            batch.append(name)
+            if len(batch) < options['batch_size']:
+                continue
+            state['deleted'] += self.process_batch(
+                batch, min_mtime, options['dry_run'])
+            state['checked'] += len(batch)
+            state['last'] = batch[-1]
+            batch = []
+            if not options['dry_run']:
+                self.save_checkpoint(checkpoint, state)
+        if batch:
+            state['deleted'] += self.process_batch(
+                batch, min_mtime, options['dry_run'])
+            state['checked'] += len(batch)
+
+        if os.path.exists(checkpoint) and not options['dry_run']:
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов: {state["checked"]}, '
+            f'{"найдено" if options["dry_run"] else "удалено"} '
+            f'лишних: {state["deleted"]}'))
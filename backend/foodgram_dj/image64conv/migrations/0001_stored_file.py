@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Файловые поля, ссылки из которых учитываются в StoredFile.
+FILE_FIELDS = [
+    ('recipes', 'Recipe', 'image'),
+    ('userprofile', 'UserProfile', 'avatar'),
+]
+
+
+def count_references(apps, schema_editor):
+    """Заполнение счетчиков ссылок по существующим записям."""
+    StoredFile = apps.get_model('image64conv', 'StoredFile')
+    references = {}
+    for app_label, model_name, field in FILE_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        rows = (model.objects.exclude(**{field: ''})
+                .exclude(**{f'{field}__isnull': True})
+                .order_by().values(field).annotate(total=Count('pk'))
+                .values_list(field, 'total'))
+        for name, total in rows.iterator():
+            references[name] = references.get(name, 0) + total
+    StoredFile.objects.bulk_create(
+        [StoredFile(name=name, references=total)
+         for name, total in references.items()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('recipes', '0004_alter_ingredientrecipe_amount_and_more'),
+        ('userprofile', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+            ],
+            options={
+                'verbose_name': 'файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
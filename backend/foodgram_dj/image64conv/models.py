@@ -0,0 +1,22 @@
+"""Учет ссылок на файлы хранилища."""
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """
+    Файл хранилища и число записей в БД, которые на него ссылаются.
+
+    Счетчик меняется в той же транзакции, что и ссылающиеся записи
+    (см. image64conv.cleanup), а строка блокируется на время загрузки
+    файла, поэтому удаление файла не может разойтись с появлением на
+    него новой ссылки.
+    """
+    name = models.CharField('Имя файла', max_length=255, primary_key=True)
+    references = models.PositiveIntegerField('Число ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return f'{self.name} ({self.references})'
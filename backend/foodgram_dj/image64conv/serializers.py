@@ -6,6 +6,8 @@ from base64 import b64decode
 import uuid
 from django.core.files.base import ContentFile
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .utils import build_file_url
 
 
 class Base64ImageField(serializers.ImageField):
@@ -23,3 +25,12 @@ class Base64ImageField(serializers.ImageField):
             data = ContentFile(b64decode(imgdata), name=filename)
 
         return super().to_internal_value(data)
+
+    def to_representation(self, value):
+        """URL картинки, построенный с запоминанием в пределах запроса."""
+        if not value:
+            return None
+        if not getattr(self, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return value.name
+        return build_file_url(self.context.get('request'),
+                              value.storage, value.name)
@@ -0,0 +1,60 @@
+"""Хранилище файлов с адресацией по содержимому."""
+import hashlib
+import os
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from .cleanup import lock_file
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, именующее файлы по хешу содержимого.
+
+    Файл сохраняется как <каталог>/<ab>/<cd>/<sha256><расширение>,
+    где ab и cd — первые символы хеша, так что ни один каталог не
+    разрастается. Повторная загрузка того же содержимого возвращает
+    имя уже существующего файла без записи на диск. Ссылки на файлы
+    считаются в StoredFile, и удаляются файлы только когда ссылок на
+    них не осталось (см. image64conv.cleanup).
+    """
+
+    hash_chunk_size = 64 * 1024
+
+    def __init__(self, *args, **kwargs):
+        # Одинаковое имя гарантирует одинаковое содержимое, поэтому
+        # при одновременной загрузке файл можно просто перезаписать.
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(*args, **kwargs)
+
+    def get_content_hash(self, content):
+        """Хеш SHA-256 содержимого файла."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks(self.hash_chunk_size):
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+
+    def get_hashed_name(self, name, content):
+        """Имя файла в хранилище, построенное по хешу содержимого."""
+        dir_name, file_name = os.path.split(str(name).replace('\\', '/'))
+        ext = os.path.splitext(file_name)[1].lower()
+        content_hash = self.get_content_hash(content)
+        return '/'.join(filter(None, (
+            dir_name, content_hash[:2], content_hash[2:4],
+            content_hash + ext
+        )))
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл, если файла с таким содержимым еще нет."""
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        # Строка файла остается заблокированной до конца транзакции,
+        # поэтому очистка не удалит файл, пока запись со ссылкой на
+        # него не зафиксирована или не отменена.
+        lock_file(name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
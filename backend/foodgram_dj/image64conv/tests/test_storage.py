@@ -0,0 +1,83 @@
+"""Хранилище с адресацией по содержимому и учет ссылок на файлы."""
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+from api.tests.utils import MediaTestMixin, create_user
+from image64conv.models import StoredFile
+from recipes.models import Recipe
+
+UPLOAD_DIR = 'recipes/images'
+
+
+class ContentAddressedStorageTest(MediaTestMixin, TestCase):
+    """Одинаковые картинки хранятся одним файлом, пока на него ссылаются."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = create_user(1)
+
+    def create_recipe(self, content):
+        return Recipe.objects.create(
+            author=self.author, name='Суп', text='Сварить.',
+            cooking_time=10,
+            image=ContentFile(content, name='upload.png'))
+
+    def references(self, name):
+        stored = StoredFile.objects.filter(name=name).first()
+        return stored and stored.references
+
+    def test_name_is_sharded_content_hash(self):
+        recipe = self.create_recipe(b'first')
+        directory, first, second, file_name = recipe.image.name.rsplit(
+            '/', 3)
+        self.assertEqual(directory, UPLOAD_DIR)
+        self.assertEqual(file_name[:4], first + second)
+        self.assertTrue(file_name.endswith('.png'))
+
+    def test_same_content_is_written_once(self):
+        first = self.create_recipe(b'same')
+        with mock.patch.object(FileSystemStorage, '_save') as save:
+            second = self.create_recipe(b'same')
+        save.assert_not_called()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.stored_files(UPLOAD_DIR), {first.image.name})
+        self.assertEqual(self.references(first.image.name), 2)
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_recipe(b'same')
+        second = self.create_recipe(b'same')
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.stored_files(UPLOAD_DIR), {name})
+        self.assertEqual(self.references(name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.stored_files(UPLOAD_DIR), set())
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replaced_file_deleted(self):
+        recipe = self.create_recipe(b'old')
+        old_name = recipe.image.name
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        recipe.image = ContentFile(b'new', name='upload.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        self.assertEqual(self.stored_files(UPLOAD_DIR), {recipe.image.name})
+        self.assertFalse(self.references(old_name))
+        self.assertEqual(self.references(recipe.image.name), 1)
+
+    def test_deleted_file_rewritten_on_upload(self):
+        recipe = self.create_recipe(b'same')
+        name = recipe.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(self.stored_files(UPLOAD_DIR), set())
+
+        recipe = self.create_recipe(b'same')
+        self.assertEqual(recipe.image.name, name)
+        self.assertEqual(self.stored_files(UPLOAD_DIR), {name})
+        self.assertEqual(self.references(name), 1)
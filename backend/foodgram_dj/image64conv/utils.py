@@ -0,0 +1,67 @@
+"""Вспомогательные функции для работы с файлами изображений."""
+from contextlib import contextmanager
+from django.db import transaction
+from .cleanup import delete_on_rollback, delete_unreferenced
+
+
+@contextmanager
+def atomic_with_files(instance, *field_names, using=None):
+    """
+    Атомарный блок, в котором сохраняются файловые поля модели.
+
+    Файлы, записанные в хранилище при сохранении instance внутри блока,
+    остаются на диске, только если транзакция зафиксирована. Если блок
+    завершился ошибкой, они удаляются сразу, а если блок вложен во
+    внешнюю транзакцию — также и при ее откате, чтобы на диске не
+    оставалось файлов без записи в БД.
+    """
+    names_before = {
+        name: getattr(instance, name).name for name in field_names
+    }
+
+    def new_files():
+        for name in field_names:
+            file = getattr(instance, name)
+            if (file
+               and file._committed
+               and file.name != names_before[name]):
+                yield file
+
+    try:
+        with transaction.atomic(using=using):
+            yield
+    except Exception:
+        for file in new_files():
+            # Тот же файл может использоваться другими записями.
+            delete_unreferenced(file.storage, [file.name])
+        raise
+    for file in new_files():
+        delete_on_rollback(file.storage, [file.name], using=using)
+
+
+def build_file_url(request, storage, name):
+    """
+    Абсолютный URL файла, как его выводит ImageField.
+
+    Адрес сайта вычисляется один раз на запрос, а URL каждого файла
+    запоминается: в списках один и тот же аватар автора выводится
+    многократно.
+    """
+    if not name:
+        return None
+    if request is None:
+        return storage.url(name)
+    urls = getattr(request, '_file_urls', None)
+    if urls is None:
+        urls = request._file_urls = {}
+        request._site_url = request.build_absolute_uri('/').rstrip('/')
+    key = (id(storage), name)
+    url = urls.get(key)
+    if url is None:
+        url = storage.url(name)
+        if url.startswith('/'):
+            url = request._site_url + url
+        else:
+            url = request.build_absolute_uri(url)
+        urls[key] = url
+    return url
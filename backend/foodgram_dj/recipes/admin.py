@@ -1,20 +1,24 @@
 """Настройка админ-зоны для приложения рецептов и ингредиентов."""
 from django.contrib import admin
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from api.paginators import EstimatedCountPaginator
+from .nutrition import update_totals
 from .models import (Recipe,
                      Ingredient,
                      IngredientRecipe,
                      ShoppingCart,
-                     Favorites
+                     Favorites,
+                     MealPlanEntry
                      )
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     """Настройки админки для модели ингредиентов."""
-    list_display = ('name', 'measurement_unit')
+    list_display = ('name', 'measurement_unit', 'calories', 'proteins',
+                    'fats', 'carbohydrates', 'price')
     search_fields = ('name',)
-    list_filter = ('name',)
     empty_value_display = '-пусто-'
 
 
@@ -22,26 +26,45 @@ class IngredientRecipeInline(admin.StackedInline):
     """Инлайн для отображения ингредиентов в рецепте."""
     model = IngredientRecipe
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    """Настройки админки для модели рецептов."""
-    list_display = ('name', 'author', 'favorites_count')
+    """
+    Настройки админки для модели рецептов.
+
+    Список рассчитан на большие таблицы: число добавлений в избранное
+    считается подзапросом только для строк страницы, автор загружается
+    JOIN, общее число рецептов оценивается по статистике БД.
+    """
+    list_display = ('name', 'author', 'created_at', 'calories',
+                    'favorites_count')
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username')
-    list_filter = ('name', 'author__username')
+    autocomplete_fields = ('author',)
     inlines = (IngredientRecipeInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
-    @admin.display(description='Добавлений в избранное')
+    @admin.display(description='Добавлений в избранное',
+                   ordering='_favorites_count')
     def favorites_count(self, obj):
-        return obj.user_favs.count()
+        return obj._favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        """Пересчет итогов после сохранения ингредиентов из инлайна."""
+        super().save_related(request, form, formsets, change)
+        update_totals(Recipe.objects.filter(pk=form.instance.pk))
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.annotate(
-            _favorites_count=Count('user_favs')
-        ).order_by('-_favorites_count')
+        return queryset.annotate(_favorites_count=Coalesce(Subquery(
+            Favorites.objects.filter(recipe=OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(total=Count('pk')).values('total')
+        ), 0))
 
 
 # @admin.register(IngredientRecipe)
@@ -56,7 +79,11 @@ class RecipeAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     """Настройки админки для списка покупок."""
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -64,5 +91,21 @@ class ShoppingCartAdmin(admin.ModelAdmin):
 class FavoritesAdmin(admin.ModelAdmin):
     """Настройки админки для избранных рецептов."""
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+@admin.register(MealPlanEntry)
+class MealPlanEntryAdmin(admin.ModelAdmin):
+    """Настройки админки для плана питания."""
+    list_display = ('date', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
@@ -7,3 +7,14 @@ class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = 'Рецепты'
+
+    def ready(self):
+        """
+        Подключение очистки файлов изображений рецептов и сброса кеша
+        коротких ссылок.
+        """
+        from image64conv.cleanup import track_file_fields
+        from .models import Recipe
+        from . import shortlinks  # noqa: F401
+
+        track_file_fields(Recipe, 'image')
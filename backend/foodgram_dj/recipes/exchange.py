@@ -0,0 +1,67 @@
+"""
+Формат выгрузки рецептов для команд export_recipes и import_recipes.
+
+Каждый рецепт — одна строка JSON (JSONL) с автором, ингредиентами
+и картинкой. В файле .jsonl картинка хранится в поле image_data
+в base64, в архиве .tar рядом с recipes.jsonl лежат файлы images/...,
+а поле image содержит путь к файлу в архиве. Авторы и ингредиенты
+сопоставляются по email и по паре (название, единица измерения).
+"""
+import base64
+from django.contrib.auth import get_user_model
+from .models import IngredientRecipe, Recipe
+
+User = get_user_model()
+
+JSONL_NAME = 'recipes.jsonl'
+IMAGES_DIR = 'images/'
+
+RECIPE_FIELDS = ('id', 'name', 'text', 'cooking_time', 'image',
+                 'created_at', 'author_id')
+AUTHOR_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+
+
+def iter_recipe_batches(batch_size):
+    """Рецепты пачками по возрастанию id, без загрузки всей таблицы."""
+    last_pk = 0
+    while True:
+        batch = list(Recipe.objects.filter(pk__gt=last_pk).order_by(
+            'pk').values(*RECIPE_FIELDS)[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1]['id']
+        yield batch
+
+
+def build_records(batch):
+    """Записи выгрузки для пачки строк рецептов (два запроса)."""
+    authors = {
+        row.pop('id'): row for row in User.objects.filter(
+            pk__in={row['author_id'] for row in batch}
+        ).values(*AUTHOR_FIELDS)
+    }
+    ingredients = {row['id']: [] for row in batch}
+    for recipe_id, name, unit, amount in IngredientRecipe.objects.filter(
+        recipe_id__in=ingredients
+    ).order_by('pk').values_list(
+        'recipe_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    ):
+        ingredients[recipe_id].append(
+            {'name': name, 'measurement_unit': unit, 'amount': amount})
+    return [
+        {
+            'name': row['name'],
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+            'created_at': row['created_at'].isoformat(),
+            'author': authors[row['author_id']],
+            'ingredients': ingredients[row['id']],
+            'image': row['image'],
+        }
+        for row in batch
+    ]
+
+
+def encode_image(data):
+    return base64.b64encode(data).decode('ascii')
@@ -1,26 +1,78 @@
 """Фильтры для приложения recipes."""
-from .models import Recipe
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+from .models import Favorites, IngredientRecipe, Recipe, ShoppingCart
 from django_filters import rest_framework as filters
 
+# Наибольшее число ингредиентов в фильтрах ingredients/exclude_ingredients.
+MAX_INGREDIENTS = 20
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Список чисел через запятую: ?author=1,2."""
+
 
 class RecipeFilter(filters.FilterSet):
-    """Фильтр для рецептов."""
+    """
+    Фильтр для рецептов.
+
+    Условия на связанные таблицы записываются подзапросами EXISTS,
+    а не JOIN, поэтому рецепты в выдаче не дублируются и DISTINCT
+    не нужен.
+    """
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_in_shopping_cart')
+    author = NumberInFilter(field_name='author_id')
+    min_cooking_time = filters.NumberFilter(field_name='cooking_time',
+                                            lookup_expr='gte')
+    max_cooking_time = filters.NumberFilter(field_name='cooking_time',
+                                            lookup_expr='lte')
+    ingredients = NumberInFilter(method='filter_ingredients')
+    exclude_ingredients = NumberInFilter(method='filter_exclude_ingredients')
+    min_calories = filters.NumberFilter(field_name='calories',
+                                        lookup_expr='gte')
+    max_calories = filters.NumberFilter(field_name='calories',
+                                        lookup_expr='lte')
+    ordering = filters.OrderingFilter(
+        fields=('created_at', 'calories', 'cost', 'cooking_time'))
 
     class Meta:
         model = Recipe
-        fields = ['author', 'name']
+        fields = ['name']
 
     def filter_is_favorited(self, queryset, name, value):
         """Возвращает список рецептов из Избранного данного пользователя."""
         if value and self.request.user.is_authenticated:
-            return queryset.filter(user_favs__user=self.request.user)
+            return queryset.filter(Exists(Favorites.objects.filter(
+                recipe=OuterRef('pk'), user=self.request.user)))
         return queryset
 
     def filter_in_shopping_cart(self, queryset, name, value):
         """Возвращает список рецептов из Корзины данного пользователя."""
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shopping_carts__user=self.request.user)
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                recipe=OuterRef('pk'), user=self.request.user)))
         return queryset
+
+    def check_ingredients_count(self, name, value):
+        """Каждый ингредиент — отдельный подзапрос, их число ограничено."""
+        if len(value) > MAX_INGREDIENTS:
+            raise ValidationError({name: [
+                f'Можно указать не больше {MAX_INGREDIENTS} ингредиентов.'
+            ]})
+
+    def filter_ingredients(self, queryset, name, value):
+        """Рецепты, в которых есть все перечисленные ингредиенты."""
+        self.check_ingredients_count(name, value)
+        for ingredient_id in set(value):
+            queryset = queryset.filter(Exists(
+                IngredientRecipe.objects.filter(
+                    recipe=OuterRef('pk'), ingredient_id=ingredient_id)))
+        return queryset
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        """Рецепты без перечисленных ингредиентов."""
+        self.check_ingredients_count(name, value)
+        return queryset.exclude(Exists(IngredientRecipe.objects.filter(
+            recipe=OuterRef('pk'), ingredient_id__in=value)))
@@ -0,0 +1,33 @@
+"""
+Декодирование и проверка картинок выгрузки рецептов в пуле процессов.
+
+Модуль не импортирует Django: при запуске процессов пула методом spawn
+или forkserver (macOS, новые версии Python) каждый процесс заново
+импортирует модуль с функцией, а ORM без django.setup() не работает.
+"""
+import base64
+import io
+from PIL import Image
+
+
+def decode_image(payload):
+    """
+    Декодирует и проверяет картинку; возвращает (байты, расширение).
+
+    Для поврежденной картинки вместо байтов возвращается None.
+    """
+    data = base64.b64decode(payload) if isinstance(payload, str) else payload
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            extension = image.format.lower()
+    except Exception:
+        return None, None
+    return data, 'jpg' if extension == 'jpeg' else extension
+
+
+def decode_images(payloads, pool=None):
+    """decode_image для каждой картинки, в процессах pool, если он задан."""
+    if pool is None:
+        return list(map(decode_image, payloads))
+    return list(pool.map(decode_image, payloads, chunksize=16))
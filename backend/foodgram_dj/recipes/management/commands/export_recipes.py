@@ -0,0 +1,97 @@
+"""Команда для выгрузки рецептов в JSONL или tar."""
+import io
+import json
+import os
+import tarfile
+import tempfile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from recipes.exchange import (IMAGES_DIR, JSONL_NAME, build_records,
+                              encode_image, iter_recipe_batches)
+
+
+class Command(BaseCommand):
+    """
+    Выгружает рецепты с авторами, ингредиентами и картинками.
+
+    Рецепты читаются пачками и сразу пишутся в файл, поэтому память
+    не зависит от размера каталога. Формат выбирается по расширению:
+    .jsonl (картинки в base64 внутри строк) или .tar (картинки
+    отдельными файлами). Архив не сжимается: загрузка читает картинки
+    в произвольном порядке, а в сжатом архиве это многократная
+    распаковка.
+    """
+
+    help = 'Выгружает рецепты в файл JSONL или архив tar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки: .jsonl или .tar.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество рецептов, читаемых одним запросом.')
+        parser.add_argument(
+            '--no-images', action='store_true',
+            help='Не выгружать картинки.')
+
+    def read_image(self, name):
+        try:
+            with default_storage.open(name, 'rb') as file:
+                return file.read()
+        except OSError:
+            self.stderr.write(f'Нет файла картинки: {name}')
+            return None
+
+    def export_jsonl(self, file, options):
+        count = 0
+        for batch in iter_recipe_batches(options['batch_size']):
+            for record in build_records(batch):
+                name = record.pop('image')
+                data = None if options['no_images'] else self.read_image(name)
+                if data is not None:
+                    record['image_data'] = encode_image(data)
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    def export_tar(self, path, options):
+        # Строки копятся во временном файле: размер члена архива
+        # должен быть известен до записи.
+        with tarfile.open(path, 'w') as archive, \
+                tempfile.TemporaryFile('w+b') as lines:
+            count = 0
+            added = set()
+            for batch in iter_recipe_batches(options['batch_size']):
+                for record in build_records(batch):
+                    name = record.pop('image')
+                    data = (None if options['no_images']
+                            else self.read_image(name))
+                    if data is not None:
+                        member = IMAGES_DIR + name
+                        if member not in added:
+                            info = tarfile.TarInfo(member)
+                            info.size = len(data)
+                            archive.addfile(info, io.BytesIO(data))
+                            added.add(member)
+                        record['image'] = member
+                    lines.write(json.dumps(
+                        record, ensure_ascii=False).encode() + b'\n')
+                    count += 1
+            info = tarfile.TarInfo(JSONL_NAME)
+            info.size = lines.tell()
+            lines.seek(0)
+            archive.addfile(info, lines)
+        return count
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path.endswith(('.tar.gz', '.tgz')):
+            raise CommandError(
+                'Сжатые архивы не поддерживаются, укажите файл .tar.')
+        if path.endswith('.tar'):
+            count = self.export_tar(path, options)
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                count = self.export_jsonl(file, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено рецептов: {count} в {os.path.abspath(path)}'))
@@ -0,0 +1,273 @@
+"""Команда для загрузки рецептов из JSONL или tar."""
+import json
+import os
+import tarfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from image64conv.cleanup import change_references, delete_unreferenced
+from recipes.exchange import JSONL_NAME
+from recipes.imaging import decode_images
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.nutrition import update_totals
+from userprofile.counters import change_counter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Загружает рецепты, выгруженные командой export_recipes.
+
+    Строки читаются потоком и обрабатываются пачками: авторы,
+    ингредиенты, рецепты и их ингредиенты создаются через bulk_create,
+    картинки декодируются и проверяются в пуле процессов. После каждой
+    пачки номер строки сохраняется в контрольную точку, и прерванная
+    загрузка продолжается с места остановки. Рецепты, у автора которых
+    уже есть рецепт с тем же названием и временем создания,
+    пропускаются, поэтому повторный запуск не создает дублей. Рецепты
+    без картинки или с поврежденной картинкой загружаются без нее
+    и учитываются в итогах отдельно.
+    """
+
+    help = 'Загружает рецепты из файла JSONL или архива tar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки: .jsonl или .tar.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество рецептов, сохраняемых одной транзакцией.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов для декодирования картинок '
+                 '(0 — без пула).')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки (по умолчанию <path>.checkpoint).')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать загрузку заново, игнорируя контрольную точку.')
+
+    def iter_lines(self, path, archive):
+        if archive is None:
+            with open(path, encoding='utf-8') as file:
+                yield from file
+        else:
+            with archive.extractfile(self.members[JSONL_NAME]) as file:
+                for line in file:
+                    yield line.decode('utf-8')
+
+    def open_archive(self, path):
+        """
+        Открывает архив tar без сжатия; для файла JSONL возвращает None.
+
+        Картинки читаются из архива в порядке рецептов, а не в порядке
+        записи, поэтому архив должен допускать переход к любому файлу.
+        В сжатом архиве каждый такой переход распаковывает его заново.
+        """
+        if not tarfile.is_tarfile(path):
+            return None
+        try:
+            archive = tarfile.open(path, 'r:')
+        except tarfile.ReadError:
+            raise CommandError(
+                'Сжатые архивы не поддерживаются, распакуйте архив '
+                'перед загрузкой.')
+        # getmember ищет файл перебором всех заголовков архива.
+        self.members = {member.name: member for member in archive}
+        return archive
+
+    def get_authors(self, records):
+        """Id авторов по email; недостающие авторы создаются."""
+        authors = {record['author']['email']: record['author']
+                   for record in records}
+        existing = dict(User.objects.filter(
+            email__in=authors).values_list('email', 'pk'))
+        User.objects.bulk_create([
+            User(password=make_password(None), **author)
+            for email, author in authors.items() if email not in existing
+        ], ignore_conflicts=True)
+        return dict(User.objects.filter(
+            email__in=authors).values_list('email', 'pk'))
+
+    def get_ingredients(self, records):
+        """Id ингредиентов по (название, единица); недостающие создаются."""
+        keys = {(item['name'], item['measurement_unit'])
+                for record in records for item in record['ingredients']}
+
+        def load():
+            return {
+                (name, unit): pk for pk, name, unit in
+                Ingredient.objects.filter(
+                    name__in={name for name, unit in keys}
+                ).values_list('pk', 'name', 'measurement_unit')
+                if (name, unit) in keys
+            }
+
+        ingredients = load()
+        missing = keys - ingredients.keys()
+        if missing:
+            Ingredient.objects.bulk_create([
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing
+            ])
+            ingredients = load()
+        return ingredients
+
+    def read_images(self, records, archive, pool):
+        """
+        Проверенные картинки рецептов в порядке records.
+
+        Для записи без картинки (выгрузка с --no-images или без файла
+        картинки) вместо пары (байты, расширение) возвращается None.
+        """
+        payloads = []
+        for record in records:
+            if archive is not None and record.get('image'):
+                member = self.members[record['image']]
+                with archive.extractfile(member) as file:
+                    payloads.append(file.read())
+            else:
+                payloads.append(record.get('image_data'))
+        decoded = iter(decode_images(
+            [payload for payload in payloads if payload], pool))
+        return [next(decoded) if payload else None for payload in payloads]
+
+    def import_batch(self, records, archive, pool, state):
+        """Сохраняет пачку записей и добавляет число новых рецептов в state."""
+        authors = self.get_authors(records)
+        ingredients = self.get_ingredients(records)
+        for record in records:
+            record['created_at'] = parse_datetime(record['created_at'])
+        existing = set(Recipe.objects.filter(
+            author_id__in=authors.values(),
+            name__in={record['name'] for record in records},
+            created_at__in={record['created_at'] for record in records}
+        ).values_list('author_id', 'name', 'created_at'))
+
+        new_records = []
+        for record in records:
+            author_id = authors.get(record['author']['email'])
+            key = (author_id, record['name'], record['created_at'])
+            if author_id is None:
+                self.stderr.write(
+                    f'Автор не создан: {record["author"]["email"]}')
+            elif key not in existing:
+                existing.add(key)
+                new_records.append((author_id, record))
+
+        images = self.read_images(
+            [record for _, record in new_records], archive, pool)
+        storage = Recipe._meta.get_field('image').storage
+        upload_to = Recipe._meta.get_field('image').upload_to
+        saved = []
+        without_image = 0
+        try:
+            # Файлы записываются в той же транзакции, что и рецепты:
+            # до ее завершения очистка не может их удалить.
+            with transaction.atomic():
+                recipes = []
+                for (author_id, record), image in zip(new_records, images):
+                    data, extension = image or (None, None)
+                    if data is not None:
+                        name = storage.save(
+                            f'{upload_to}/import.{extension}',
+                            ContentFile(data))
+                        saved.append(name)
+                    else:
+                        name = ''
+                        without_image += 1
+                        self.stderr.write(
+                            ('Нет картинки' if image is None
+                             else 'Картинка повреждена')
+                            + f', рецепт загружен без нее: {record["name"]}')
+                    recipes.append((record, Recipe(
+                        author_id=author_id, name=record['name'],
+                        text=record['text'], image=name,
+                        cooking_time=record['cooking_time'])))
+
+                Recipe.objects.bulk_create(
+                    [recipe for _, recipe in recipes])
+                for record, recipe in recipes:
+                    recipe.created_at = record['created_at']
+                Recipe.objects.bulk_update(
+                    [recipe for _, recipe in recipes], ['created_at'])
+                IngredientRecipe.objects.bulk_create([
+                    IngredientRecipe(
+                        recipe=recipe,
+                        ingredient_id=ingredients[
+                            (item['name'], item['measurement_unit'])],
+                        amount=item['amount'])
+                    for record, recipe in recipes
+                    for item in record['ingredients']
+                ])
+                update_totals(Recipe.objects.filter(
+                    pk__in=[recipe.pk for _, recipe in recipes]))
+                # bulk_create не отправляет сигналы счетчиков и учета
+                # ссылок на файлы.
+                for author_id, count in Counter(
+                        recipe.author_id for _, recipe in recipes).items():
+                    change_counter(author_id, 'recipes_count', count)
+                change_references(saved, 1)
+        except Exception:
+            delete_unreferenced(storage, saved)
+            raise
+        state['imported'] += len(recipes)
+        state['without_image'] += without_image
+
+    def load_checkpoint(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checkpoint(self, path, state):
+        with open(path, 'w') as file:
+            json.dump(state, file)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        state = {} if options['restart'] else self.load_checkpoint(checkpoint)
+        state.setdefault('line', 0)
+        state.setdefault('imported', 0)
+        state.setdefault('without_image', 0)
+        if state['line']:
+            self.stdout.write(f'Продолжение со строки {state["line"] + 1}')
+
+        archive = self.open_archive(path)
+        pool = (ProcessPoolExecutor(options['workers'])
+                if options['workers'] else None)
+        try:
+            batch = []
+            for number, line in enumerate(
+                    self.iter_lines(path, archive), 1):
+                if number <= state['line'] or not line.strip():
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) < options['batch_size']:
+                    continue
+                self.import_batch(batch, archive, pool, state)
+                state['line'] = number
+                self.save_checkpoint(checkpoint, state)
+                batch = []
+            if batch:
+                self.import_batch(batch, archive, pool, state)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if archive is not None:
+                archive.close()
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {state["imported"]}, '
+            f'из них без картинки: {state["without_image"]}'))
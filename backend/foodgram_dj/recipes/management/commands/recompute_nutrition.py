@@ -0,0 +1,45 @@
+"""Команда для пересчета пищевой ценности и стоимости рецептов."""
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+from recipes.nutrition import update_totals
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает итоги рецептов после изменения данных ингредиентов.
+
+    Рецепты обрабатываются пачками по возрастанию id, каждая пачка —
+    один UPDATE с подзапросами по ингредиентам, без загрузки рецептов
+    в память.
+    """
+
+    help = 'Пересчитывает калорийность, БЖУ и стоимость рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество рецептов, пересчитываемых одним запросом.')
+        parser.add_argument(
+            '--ingredient', type=int, action='append', default=[],
+            help='Пересчитать только рецепты с этим ингредиентом '
+                 '(можно указать несколько раз).')
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options['ingredient']:
+            queryset = queryset.filter(
+                recipe_ingredients__ingredient_id__in=options['ingredient']
+            ).distinct()
+
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            updated += update_totals(Recipe.objects.filter(pk__in=batch))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {updated}'))
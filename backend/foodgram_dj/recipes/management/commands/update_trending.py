@@ -0,0 +1,20 @@
+"""Команда для пересчета популярности рецептов."""
+from django.core.management.base import BaseCommand
+from recipes.trending import update_trending
+
+
+class Command(BaseCommand):
+    """
+    Учитывает новые добавления в избранное и списки покупок.
+
+    Запускается периодически (например, cron раз в несколько минут);
+    каждый запуск читает только добавления после предыдущего.
+    """
+
+    help = 'Обновляет оценки популярности рецептов.'
+
+    def handle(self, *args, **options):
+        until, count = update_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтены добавления до {until:%Y-%m-%d %H:%M:%S}, '
+            f'рецептов с новыми добавлениями: {count}'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_favorites_fav_user_recipe_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortLink',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='short_link', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('code', models.CharField(max_length=16, unique=True, verbose_name='Код')),
+            ],
+            options={
+                'verbose_name': 'короткая ссылка',
+                'verbose_name_plural': 'Короткие ссылки',
+            },
+        ),
+    ]
@@ -28,6 +28,27 @@ class Ingredient(models.Model):
         null=False,
         max_length=30
     )
+    # Пищевая ценность и цена на одну единицу измерения.
+    calories = models.DecimalField(
+        _('Калорийность, ккал'), max_digits=9, decimal_places=3,
+        default=0, validators=[MinValueValidator(0)]
+    )
+    proteins = models.DecimalField(
+        _('Белки, г'), max_digits=9, decimal_places=3,
+        default=0, validators=[MinValueValidator(0)]
+    )
+    fats = models.DecimalField(
+        _('Жиры, г'), max_digits=9, decimal_places=3,
+        default=0, validators=[MinValueValidator(0)]
+    )
+    carbohydrates = models.DecimalField(
+        _('Углеводы, г'), max_digits=9, decimal_places=3,
+        default=0, validators=[MinValueValidator(0)]
+    )
+    price = models.DecimalField(
+        _('Цена, руб.'), max_digits=9, decimal_places=3,
+        default=0, validators=[MinValueValidator(0)]
+    )
 
     class Meta:
         ordering = ['name', ]
@@ -82,11 +103,46 @@ class Recipe(models.Model):
         'Добавлено',
         auto_now_add=True
     )
+    # Итоги по ингредиентам рецепта, см. recipes.nutrition.
+    calories = models.DecimalField(
+        _('Калорийность, ккал'), max_digits=12, decimal_places=2,
+        default=0, editable=False
+    )
+    proteins = models.DecimalField(
+        _('Белки, г'), max_digits=12, decimal_places=2,
+        default=0, editable=False
+    )
+    fats = models.DecimalField(
+        _('Жиры, г'), max_digits=12, decimal_places=2,
+        default=0, editable=False
+    )
+    carbohydrates = models.DecimalField(
+        _('Углеводы, г'), max_digits=12, decimal_places=2,
+        default=0, editable=False
+    )
+    cost = models.DecimalField(
+        _('Стоимость, руб.'), max_digits=12, decimal_places=2,
+        default=0, editable=False
+    )
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('рецепт')
         verbose_name_plural = _('Рецепты')
+        indexes = [
+            # Общая лента рецептов.
+            models.Index(fields=['-created_at'],
+                         name='recipe_created_at_idx'),
+            # Лента рецептов автора (фильтр author).
+            models.Index(fields=['author', '-created_at'],
+                         name='recipe_author_created_idx'),
+            # Фильтр и сортировка по калорийности.
+            models.Index(fields=['calories'],
+                         name='recipe_calories_idx'),
+            # Фильтр по времени приготовления.
+            models.Index(fields=['cooking_time'],
+                         name='recipe_cooking_time_idx'),
+        ]
 
     def __str__(self):
         """Строковое представление рецепта его именем."""
@@ -133,6 +189,12 @@ class IngredientRecipe(models.Model):
                 name='unique_recipe_ingredient'
             )
         ]
+        indexes = [
+            # Поиск рецептов по ингредиенту (фильтры ingredients и
+            # exclude_ingredients).
+            models.Index(fields=['ingredient', 'recipe'],
+                         name='ingr_recipe_ingredient_idx'),
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -151,6 +213,10 @@ class ShoppingCart(models.Model):
         verbose_name='Рецепт',
         null=False
     )
+    created_at = models.DateTimeField(
+        'Добавлено',
+        auto_now_add=True
+    )
 
     class Meta:
         verbose_name = 'список покупок'
@@ -161,6 +227,14 @@ class ShoppingCart(models.Model):
                 name='unique_recipe_user'
             )
         ]
+        indexes = [
+            # Фильтр is_in_shopping_cart и выгрузка списка покупок.
+            models.Index(fields=['user', 'recipe'],
+                         name='cart_user_recipe_idx'),
+            # Чтение новых добавлений для расчета популярности.
+            models.Index(fields=['created_at'],
+                         name='cart_created_at_idx'),
+        ]
 
     def __str__(self):
         return f'{self.recipe} в корзине {self.user}'
@@ -182,6 +256,10 @@ class Favorites(models.Model):
         verbose_name='Рецепт',
         null=False
     )
+    created_at = models.DateTimeField(
+        'Добавлено',
+        auto_now_add=True
+    )
 
     class Meta:
         verbose_name = 'избранное'
@@ -192,6 +270,109 @@ class Favorites(models.Model):
                 name='unique_recipe_user_fav'
             )
         ]
+        indexes = [
+            # Фильтр is_favorited.
+            models.Index(fields=['user', 'recipe'],
+                         name='fav_user_recipe_idx'),
+            # Чтение новых добавлений для расчета популярности.
+            models.Index(fields=['created_at'],
+                         name='fav_created_at_idx'),
+        ]
 
     def __str__(self):
         return f'{self.recipe} в избранном {self.user}'
+
+
+class ShortLink(models.Model):
+    """Модель короткой ссылки на рецепт."""
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='short_link',
+        verbose_name=_('Рецепт')
+    )
+    code = models.CharField(
+        _('Код'),
+        max_length=16,
+        unique=True
+    )
+
+    class Meta:
+        verbose_name = 'короткая ссылка'
+        verbose_name_plural = 'Короткие ссылки'
+
+    def __str__(self):
+        return f'{self.code} -> {self.recipe_id}'
+
+
+class TrendingScore(models.Model):
+    """
+    Популярность рецепта с затуханием по времени.
+
+    Рассчитывается командой update_trending по добавлениям
+    в избранное и в списки покупок.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='trending_score',
+        verbose_name=_('Рецепт')
+    )
+    score = models.FloatField(_('Популярность'))
+
+    class Meta:
+        verbose_name = 'популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        indexes = [
+            # Выдача популярных рецептов.
+            models.Index(fields=['-score'],
+                         name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.score:.3f}'
+
+
+class TrendingState(models.Model):
+    """Момент, до которого учтены добавления в расчете популярности."""
+    processed_until = models.DateTimeField(_('Учтено до'))
+
+    class Meta:
+        verbose_name = 'состояние расчета популярности'
+        verbose_name_plural = 'Состояние расчета популярности'
+
+    def __str__(self):
+        return f'{self.processed_until}'
+
+
+class MealPlanEntry(models.Model):
+    """Рецепт в плане питания пользователя на определенный день."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meal_plan',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='meal_plan_entries',
+        verbose_name='Рецепт'
+    )
+    date = models.DateField('День')
+
+    class Meta:
+        ordering = ['date', 'pk']
+        verbose_name = 'рецепт в плане питания'
+        verbose_name_plural = 'План питания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'recipe'],
+                name='unique_meal_plan_entry'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} на {self.date:%d.%m.%Y} у {self.user}'
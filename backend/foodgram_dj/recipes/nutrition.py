@@ -0,0 +1,52 @@
+"""
+Пищевая ценность и стоимость рецептов.
+
+Итоги хранятся в полях рецепта и считаются как сумма количества
+ингредиента, умноженного на его значение на единицу измерения. При
+сохранении рецепта через API они вычисляются из уже загруженных
+ингредиентов без запросов; для пересчета многих рецептов (после
+изменения таблицы ингредиентов) используется один UPDATE с
+подзапросами на пачку — команда recompute_nutrition.
+"""
+from decimal import Decimal
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import IngredientRecipe
+
+# Поле итога рецепта: поле ингредиента со значением на единицу.
+TOTALS = {
+    'calories': 'calories',
+    'proteins': 'proteins',
+    'fats': 'fats',
+    'carbohydrates': 'carbohydrates',
+    'cost': 'price',
+}
+
+CENT = Decimal('0.01')
+
+
+def set_totals(recipe, items):
+    """Записывает в recipe итоги по парам (ингредиент, количество)."""
+    for total, field in TOTALS.items():
+        value = sum((getattr(ingredient, field) * amount
+                     for ingredient, amount in items), Decimal(0))
+        setattr(recipe, total, value.quantize(CENT))
+
+
+def total_subquery(field):
+    """Подзапрос суммы значения field по ингредиентам рецепта."""
+    output_field = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(Subquery(
+        IngredientRecipe.objects.filter(recipe=OuterRef('pk'))
+        .order_by().values('recipe')
+        .annotate(total=Sum(F('amount') * F(f'ingredient__{field}'),
+                            output_field=output_field))
+        .values('total')
+    ), Value(0), output_field=output_field)
+
+
+def update_totals(queryset):
+    """Пересчитывает итоги рецептов queryset одним UPDATE."""
+    return queryset.update(**{
+        total: total_subquery(field) for total, field in TOTALS.items()
+    })
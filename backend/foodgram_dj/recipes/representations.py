@@ -0,0 +1,94 @@
+"""
+Быстрое построение представлений рецептов для списков.
+
+Функции строят тот же JSON, что и RecipeSerializer, но из строк
+.values() и без создания полей сериализаторов для каждой записи:
+связанные данные всей страницы загружаются одним запросом на
+каждую таблицу.
+"""
+from django.contrib.auth import get_user_model
+from image64conv.utils import build_file_url
+from userprofile.resolvers import get_subscription_resolver
+from .models import IngredientRecipe, Recipe
+
+User = get_user_model()
+
+# Поля рецепта, загружаемые для построения представления.
+RECIPE_VALUES = ('id', 'name', 'image', 'text', 'cooking_time', 'author_id',
+                 'calories', 'proteins', 'fats', 'carbohydrates', 'cost')
+AUTHOR_VALUES = ('id', 'email', 'username', 'first_name', 'last_name',
+                 'avatar', 'followers_count', 'following_count')
+
+
+def get_authors(author_ids, request):
+    """Представления авторов по id, как у UserProfileSerializer."""
+    resolver = get_subscription_resolver(request)
+    resolver.prefetch(author_ids)
+    storage = User._meta.get_field('avatar').storage
+    authors = {}
+    for row in User.objects.filter(
+            pk__in=author_ids).values(*AUTHOR_VALUES):
+        authors[row['id']] = {
+            'id': row['id'],
+            'email': row['email'],
+            'username': row['username'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'is_subscribed': resolver.is_subscribed(row['id']),
+            'avatar': build_file_url(request, storage, row['avatar']),
+            'followers_count': row['followers_count'],
+            'following_count': row['following_count'],
+        }
+    return authors
+
+
+def get_ingredients(recipe_ids):
+    """Списки ингредиентов по id рецептов."""
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for row in IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('pk').values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    ):
+        ingredients[row[0]].append({
+            'id': row[1],
+            'name': row[2],
+            'measurement_unit': row[3],
+            'amount': row[4],
+        })
+    return ingredients
+
+
+def represent_recipes(rows, request):
+    """
+    Представления рецептов из строк queryset.values(*RECIPE_VALUES).
+
+    Строки могут содержать аннотации _is_favorited и
+    _is_in_shopping_cart; без них флаги считаются ложными.
+    """
+    if not rows:
+        return []
+    authors = get_authors({row['author_id'] for row in rows}, request)
+    ingredients = get_ingredients([row['id'] for row in rows])
+    storage = Recipe._meta.get_field('image').storage
+    return [
+        {
+            'id': row['id'],
+            'author': authors[row['author_id']],
+            'is_favorited': row.get('_is_favorited', False),
+            'is_in_shopping_cart': row.get('_is_in_shopping_cart', False),
+            'name': row['name'],
+            'image': build_file_url(request, storage, row['image']),
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+            'calories': float(row['calories']),
+            'proteins': float(row['proteins']),
+            'fats': float(row['fats']),
+            'carbohydrates': float(row['carbohydrates']),
+            'cost': float(row['cost']),
+            # RecipeSerializer добавляет ингредиенты последними.
+            'ingredients': ingredients[row['id']],
+        }
+        for row in rows
+    ]
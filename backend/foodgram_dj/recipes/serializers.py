@@ -1,9 +1,13 @@
 """Сериализаторы для моделей рецептов и ингредиентов."""
 from django.core.paginator import Paginator
 from rest_framework import serializers
-from .models import Recipe, Ingredient, IngredientRecipe
+from api.fieldsets import SparseFieldsetMixin
+from .models import Recipe, Ingredient, IngredientRecipe, MealPlanEntry
+from .nutrition import set_totals
 from image64conv.serializers import Base64ImageField
-from userprofile.serializers import UserProfileSerializer
+from image64conv.utils import atomic_with_files
+from userprofile.resolvers import get_subscription_resolver
+from userprofile.serializers import UserProfileSerializer, iter_instances
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -11,15 +15,37 @@ class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
+
+
+class IngredientRecipeListSerializer(serializers.ListSerializer):
+    """
+    Список ингредиентов рецепта.
+
+    Проверяет существование всех переданных ингредиентов одним запросом
+    и сообщает обо всех ненайденных id сразу.
+    """
+
+    def to_internal_value(self, data):
+        """Подставляет объекты ингредиентов вместо их id."""
+        value = super().to_internal_value(data)
+        ingredient_ids = {item['id'] for item in value}
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        missing = sorted(ingredient_ids - ingredients.keys())
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: '
+                + ', '.join(str(pk) for pk in missing))
+        for item in value:
+            item['ingredient'] = ingredients[item.pop('id')]
+        return value
 
 
 class IngredientRecipeCreateSerializer(serializers.Serializer):
     """Сериализатор для ввода ингредиентов при создании/обновлении рецепта."""
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
-    )
+    # Существование ингредиентов проверяется для всего списка сразу
+    # в IngredientRecipeListSerializer.
+    id = serializers.IntegerField(min_value=1)
     # Количество ингредиента вместе с валидацией
     amount = serializers.IntegerField(
         min_value=1,
@@ -28,6 +54,9 @@ class IngredientRecipeCreateSerializer(serializers.Serializer):
         }
     )
 
+    class Meta:
+        list_serializer_class = IngredientRecipeListSerializer
+
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для ингредиентов."""
@@ -43,7 +72,22 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов с загрузкой подписок на авторов одним запросом."""
+
+    def to_representation(self, data):
+        data = iter_instances(data)
+        request = self.context.get('request')
+        if (request is not None
+           and isinstance(self.child.fields.get('author'),
+                          UserProfileSerializer)):
+            data = list(data)
+            get_subscription_resolver(request).prefetch(
+                recipe.author_id for recipe in data)
+        return super().to_representation(data)
+
+
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для рецептов."""
 
     cooking_time = serializers.IntegerField(
@@ -68,21 +112,32 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    # Итоги по ингредиентам (см. recipes.nutrition).
+    calories = serializers.FloatField(read_only=True)
+    proteins = serializers.FloatField(read_only=True)
+    fats = serializers.FloatField(read_only=True)
+    carbohydrates = serializers.FloatField(read_only=True)
+    cost = serializers.FloatField(read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'author',
                   'ingredients', 'is_favorited',
                   'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'text', 'cooking_time',
+                  'calories', 'proteins', 'fats', 'carbohydrates', 'cost')
         read_only_fields = ('is_favorited',
                             'is_in_shopping_cart', 'author')
+        expandable_fields = ('author',)
+        list_serializer_class = RecipeListSerializer
 
     def to_representation(self, instance):
         """Кастомное представление для чтения."""
         representation = super().to_representation(instance)
-        representation['ingredients'] = IngredientRecipeSerializer(
-            instance.recipe_ingredients.all(), many=True
-        ).data
+        if 'ingredients' in self.fields:
+            representation['ingredients'] = IngredientRecipeSerializer(
+                instance.recipe_ingredients.all(), many=True
+            ).data
         return representation
 
     def validate_ingredients(self, value):
@@ -111,6 +166,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
+        if hasattr(obj, '_is_favorited'):
+            return obj._is_favorited
         return obj.user_favs.filter(user=request.user).exists()
 
     def get_is_in_shopping_cart(self, obj):
@@ -118,12 +175,14 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
+        if hasattr(obj, '_is_in_shopping_cart'):
+            return obj._is_in_shopping_cart
         return obj.shopping_carts.filter(user=request.user).exists()
 
     def create(self, validated_data):
         """Создание рецепта с ингредиентами."""
         ingredients_data = validated_data.pop('ingredients', [])
-        recipe = Recipe.objects.create(**validated_data)
+        recipe = Recipe(**validated_data)
 
         ingredient_recipe_objects = []
         for ingredient_data in ingredients_data:
@@ -135,29 +194,70 @@ class RecipeSerializer(serializers.ModelSerializer):
                 )
             )
 
-        IngredientRecipe.objects.bulk_create(ingredient_recipe_objects)
+        set_totals(recipe, [(data['ingredient'], data['amount'])
+                            for data in ingredients_data])
+
+        # Рецепт и его ингредиенты сохраняются вместе; при ошибке
+        # записанная картинка удаляется.
+        with atomic_with_files(recipe, 'image'):
+            recipe.save(force_insert=True)
+            IngredientRecipe.objects.bulk_create(ingredient_recipe_objects)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients_data):
+        """
+        Приводит ингредиенты рецепта к переданному списку.
+
+        Вычисляет разницу с уже сохранёнными связями и применяет её
+        не более чем тремя запросами: удаление лишних, обновление
+        изменившихся количеств и добавление новых.
+        """
+        existing = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        amounts = {
+            data['ingredient'].id: data['amount']
+            for data in ingredients_data
+        }
+
+        to_delete = [item.pk for ingredient_id, item in existing.items()
+                     if ingredient_id not in amounts]
+        to_update = []
+        to_create = []
+        for ingredient_id, amount in amounts.items():
+            item = existing.get(ingredient_id)
+            if item is None:
+                to_create.append(IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=amount
+                ))
+            elif item.amount != amount:
+                item.amount = amount
+                to_update.append(item)
+
+        if to_delete:
+            IngredientRecipe.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            IngredientRecipe.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            IngredientRecipe.objects.bulk_create(to_create)
+
     def update(self, instance, validated_data):
         """Обновление рецепта с ингредиентами."""
         ingredients_data = validated_data.pop('ingredients', None)
+        if ingredients_data is not None:
+            set_totals(instance, [(data['ingredient'], data['amount'])
+                                  for data in ingredients_data])
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with atomic_with_files(instance, 'image'):
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
 
-        if ingredients_data is not None:
-            instance.recipe_ingredients.all().delete()
-            ingredient_recipe_objects = []
-            for ingredient_data in ingredients_data:
-                ingredient_recipe_objects.append(
-                    IngredientRecipe(
-                        recipe=instance,
-                        ingredient=ingredient_data['ingredient'],
-                        amount=ingredient_data['amount']
-                    )
-                )
-            IngredientRecipe.objects.bulk_create(ingredient_recipe_objects)
+            if ingredients_data is not None:
+                self.update_ingredients(instance, ingredients_data)
 
         return instance
 
@@ -171,16 +271,54 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeIdListSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для пакетных операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+        error_messages={
+            'empty': 'Нужен как минимум один рецепт!'
+        }
+    )
+
+    def validate_recipes(self, value):
+        """Убирает повторы, сохраняя порядок переданных id."""
+        return list(dict.fromkeys(value))
+
+
+class MealPlanEntrySerializer(serializers.ModelSerializer):
+    """Сериализатор рецепта в плане питания."""
+    recipe = serializers.PrimaryKeyRelatedField(
+        queryset=Recipe.objects.only('pk'))
+
+    class Meta:
+        model = MealPlanEntry
+        fields = ('id', 'recipe', 'date')
+
+    def validate(self, data):
+        """Рецепт добавляется в план на день только один раз."""
+        if MealPlanEntry.objects.filter(
+            user=self.context['request'].user,
+            date=data['date'],
+            recipe=data['recipe']
+        ).exists():
+            raise serializers.ValidationError(
+                'Рецепт уже есть в плане на этот день!')
+        return data
+
+
 class SubscriptionSerializer(UserProfileSerializer):
     """Расширяет UserSerializer полями recipes и recipes_count."""
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserProfileSerializer.Meta):
         fields = ['id', 'email',
                   'username', 'first_name',
                   'last_name', 'is_subscribed',
-                  'avatar', 'recipes', 'recipes_count']
+                  'avatar', 'followers_count', 'following_count',
+                  'recipes', 'recipes_count']
 
     def get_recipes(self, obj):
         request = self.context.get('request')
@@ -195,6 +333,3 @@ class SubscriptionSerializer(UserProfileSerializer):
         return ShortRecipeSerializer(recipes,
                                      many=True,
                                      context=self.context).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
@@ -0,0 +1,79 @@
+"""Короткие ссылки на рецепты."""
+from string import ascii_letters, digits
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from api.caches import get_shared_cache
+from .models import ShortLink
+
+BASE62_ALPHABET = digits + ascii_letters
+
+# Код ссылки не меняется, поэтому соответствие хранится в кеше долго.
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Кеш в памяти процесса не узнает об удалении рецепта в другом
+# процессе, поэтому без общего кеша записи живут недолго.
+LOCAL_CACHE_TIMEOUT = 60
+
+
+def encode_base62(number):
+    """Представление неотрицательного числа в base62."""
+    if number == 0:
+        return BASE62_ALPHABET[0]
+    code = ''
+    while number:
+        number, remainder = divmod(number, 62)
+        code = BASE62_ALPHABET[remainder] + code
+    return code
+
+
+def cache_key(code):
+    return f'short_link:{code}'
+
+
+def get_cache_timeout():
+    if get_shared_cache() is None:
+        return LOCAL_CACHE_TIMEOUT
+    return CACHE_TIMEOUT
+
+
+def get_short_link_code(recipe_id):
+    """
+    Код короткой ссылки для рецепта.
+
+    Код вычисляется по id рецепта, поэтому запись создается одним
+    INSERT без предварительного SELECT, а повторные вызовы при наличии
+    записи в кеше не обращаются к БД.
+    """
+    code = encode_base62(recipe_id)
+    if cache.get(cache_key(code)) != recipe_id:
+        ShortLink.objects.bulk_create(
+            [ShortLink(recipe_id=recipe_id, code=code)],
+            ignore_conflicts=True
+        )
+        cache.set(cache_key(code), recipe_id, get_cache_timeout())
+    return code
+
+
+def resolve_short_link(code):
+    """Id рецепта по коду ссылки или None, если ссылки нет."""
+    recipe_id = cache.get(cache_key(code))
+    if recipe_id is None:
+        recipe_id = ShortLink.objects.filter(
+            code=code).values_list('recipe_id', flat=True).first()
+        if recipe_id is not None:
+            cache.set(cache_key(code), recipe_id, get_cache_timeout())
+    return recipe_id
+
+
+@receiver(post_delete, sender=ShortLink, dispatch_uid='short_link_delete')
+def short_link_deleted(sender, instance, **kwargs):
+    """
+    Сброс кеша при удалении ссылки (вместе с рецептом).
+
+    Запись удаляется и повторно после фиксации транзакции: до нее
+    другой запрос мог прочитать ссылку из БД и снова положить в кеш.
+    """
+    key = cache_key(instance.code)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
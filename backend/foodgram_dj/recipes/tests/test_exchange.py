@@ -0,0 +1,118 @@
+"""Выгрузка и загрузка рецептов командами export/import_recipes."""
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+from api.tests.utils import MediaTestMixin, create_recipes, create_user
+from recipes.models import Ingredient, Recipe
+
+
+class RecipeExchangeTest(MediaTestMixin, TestCase):
+    """Рецепты переносятся через файл выгрузки."""
+
+    def setUp(self):
+        super().setUp()
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name='мука', measurement_unit='г'),
+        ])
+        create_recipes(create_user(1), 2, ingredients)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def export(self, name, *args):
+        path = os.path.join(self.directory, name)
+        call_command('export_recipes', path, *args,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+        Recipe.objects.all().delete()
+        return path
+
+    def import_recipes(self, path):
+        """Вывод команды import_recipes (stdout и stderr)."""
+        output = io.StringIO()
+        call_command('import_recipes', path, '--workers', '0',
+                     stdout=output, stderr=output)
+        return output.getvalue()
+
+    def export_and_import(self, name, *args):
+        return self.import_recipes(self.export(name, *args))
+
+    def save_images(self):
+        """Сохраняет рецептам одинаковую картинку PNG; возвращает ее."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+        for recipe in Recipe.objects.all():
+            recipe.image.save('a.png', ContentFile(buffer.getvalue()))
+        return buffer.getvalue()
+
+    def test_import_without_images(self):
+        # Файлов картинок рецептов из create_recipes нет в хранилище,
+        # поэтому и без --no-images они выгружаются без картинок.
+        for name in ('recipes.jsonl', 'recipes.tar'):
+            for args in ((), ('--no-images',)):
+                with self.subTest(name=name, args=args):
+                    output = self.export_and_import(name, *args)
+                    self.assertIn('без картинки: 2', output)
+                    self.assertEqual(
+                        sorted(Recipe.objects.values_list('name', 'image')),
+                        [('Рецепт 0', ''), ('Рецепт 1', '')])
+                    self.assertEqual(Recipe.objects.filter(
+                        ingredients__name='мука').count(), 2)
+
+    def test_tar_with_images(self):
+        image = self.save_images()
+        output = self.export_and_import('recipes.tar')
+        self.assertIn('без картинки: 0', output)
+        recipes = Recipe.objects.all()
+        self.assertEqual(len(recipes), 2)
+        for recipe in recipes:
+            with recipe.image.open('rb') as file:
+                self.assertEqual(file.read(), image)
+
+    def test_corrupted_image(self):
+        image = self.save_images()
+        path = self.export('recipes.jsonl')
+        with open(path, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        records[0]['image_data'] = 'bm90IGFuIGltYWdl'
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        output = self.import_recipes(path)
+        self.assertIn(
+            f'Картинка повреждена, рецепт загружен без нее: '
+            f'{records[0]["name"]}', output)
+        self.assertIn('Загружено рецептов: 2, из них без картинки: 1',
+                      output)
+        recipes = {recipe.name: recipe for recipe in Recipe.objects.all()}
+        self.assertEqual(recipes[records[0]['name']].image, '')
+        with recipes[records[1]['name']].image.open('rb') as file:
+            self.assertEqual(file.read(), image)
+
+    def test_compressed_archive_rejected(self):
+        with self.assertRaises(CommandError):
+            self.export_and_import('recipes.tar.gz')
+        path = os.path.join(self.directory, 'old.tar.gz')
+        tarfile.open(path, 'w:gz').close()
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, '--workers', '0')
+
+
+class ImagingModuleTest(SimpleTestCase):
+    """Процессы пула картинок не импортируют Django."""
+
+    def test_no_django_import(self):
+        # Так модуль импортируют процессы, запущенные методом spawn.
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, recipes.imaging; '
+             'sys.exit("django" in sys.modules)'],
+            cwd=settings.BASE_DIR, env={'PATH': os.environ['PATH']})
+        self.assertEqual(result.returncode, 0)
@@ -0,0 +1,83 @@
+"""Проверка использования индексов ленты рецептов и фильтров."""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from api.tests.utils import QueryPlanMixin
+from recipes.filters import MAX_INGREDIENTS, RecipeFilter
+from recipes.models import Favorites, IngredientRecipe, Recipe, ShoppingCart
+
+User = get_user_model()
+
+
+class RecipeIndexesTest(QueryPlanMixin, TestCase):
+    """Запросы ленты и фильтров используют составные индексы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Иванов')
+
+    def test_feed_ordered_by_created_at(self):
+        self.assertUsesIndex(Recipe.objects.all()[:6],
+                             'recipe_created_at_idx')
+
+    def test_author_feed(self):
+        self.assertUsesIndex(
+            Recipe.objects.filter(author=self.user)[:6],
+            'recipe_author_created_idx')
+
+    def test_user_favorites(self):
+        self.assertUsesIndex(
+            Favorites.objects.filter(user=self.user)
+            .order_by('recipe').values_list('recipe', flat=True),
+            'fav_user_recipe_idx')
+
+    def test_user_shopping_cart(self):
+        self.assertUsesIndex(
+            ShoppingCart.objects.filter(user=self.user)
+            .order_by('recipe').values_list('recipe', flat=True),
+            'cart_user_recipe_idx')
+
+
+class RecipeFilterPlanTest(QueryPlanMixin, TestCase):
+    """Фильтры ленты рецептов читают таблицы по индексам."""
+
+    def filter(self, **params):
+        request = Request(APIRequestFactory().get('/api/recipes/', params))
+        return RecipeFilter(request.query_params, queryset=Recipe.objects,
+                            request=request).qs
+
+    def test_cooking_time(self):
+        self.assertUsesIndex(
+            self.filter(min_cooking_time=10, max_cooking_time=30),
+            'recipe_cooking_time_idx')
+
+    def test_ingredients(self):
+        for params in ({'ingredients': '1,2'},
+                       {'exclude_ingredients': '1,2'}):
+            with self.subTest(**params):
+                queryset = self.filter(**params)
+                # Подзапросы EXISTS вместо JOIN: рецепты не дублируются.
+                self.assertIn('EXISTS', str(queryset.query))
+                self.assertNotIn('JOIN', str(queryset.query))
+        # Подзапрос по рецепту читает индекс ограничения уникальности
+        # (recipe, ingredient), а поиск рецептов по ингредиенту —
+        # индекс (ingredient, recipe).
+        self.assertUsesIndex(
+            IngredientRecipe.objects.filter(
+                ingredient_id__in=[1, 2]).values('recipe_id'),
+            'ingr_recipe_ingredient_idx')
+
+    def test_too_many_ingredients(self):
+        ids = ','.join(str(pk) for pk in range(1, MAX_INGREDIENTS + 2))
+        client = APIClient()
+        for name in ('ingredients', 'exclude_ingredients'):
+            with self.subTest(name=name):
+                response = client.get('/api/recipes/', {name: ids})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(name, response.data)
+                response = client.get(
+                    '/api/recipes/', {name: ids.rsplit(',', 1)[0]})
+                self.assertEqual(response.status_code, 200)
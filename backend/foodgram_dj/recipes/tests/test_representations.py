@@ -0,0 +1,116 @@
+"""Представления рецептов из recipes.representations."""
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.tests.utils import (BenchmarkMixin, benchmark, create_recipes,
+                             create_user)
+from recipes.models import Favorites, Ingredient, Recipe, ShoppingCart
+from recipes.nutrition import update_totals
+from recipes.representations import RECIPE_VALUES, represent_recipes
+from recipes.serializers import RecipeSerializer
+from recipes.views import RecipeViewSet
+from userprofile.models import Subscription
+
+FLAGS = ('_is_favorited', '_is_in_shopping_cart')
+
+
+class RepresentationMixin:
+    """Списки рецептов обоими способами с запросом пользователя user."""
+
+    def get_request(self, user=None):
+        request = APIRequestFactory().get('/api/recipes/')
+        if user is not None:
+            force_authenticate(request, user)
+        return Request(request)
+
+    def get_queryset(self, request):
+        """Queryset списка рецептов, как в RecipeViewSet."""
+        return RecipeViewSet(request=request, format_kwarg=None,
+                             action='list').get_queryset()
+
+    def represent(self, request):
+        queryset = self.get_queryset(request)
+        return represent_recipes(list(
+            queryset.prefetch_related(None).values(
+                *RECIPE_VALUES,
+                *(name for name in FLAGS
+                  if name in queryset.query.annotations))
+        ), request)
+
+    def serialize(self, request):
+        return RecipeSerializer(self.get_queryset(request), many=True,
+                                context={'request': request}).data
+
+
+class RepresentRecipesTest(RepresentationMixin, TestCase):
+    """represent_recipes строит тот же JSON, что и RecipeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(1)
+        cls.author.avatar = 'users/avatar.png'
+        cls.author.save()
+        cls.reader = create_user(2)
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name='мука', measurement_unit='г', calories='3.64',
+                       price='0.055'),
+            Ingredient(name='молоко', measurement_unit='мл',
+                       proteins='0.032', fats='0.025'),
+        ])
+        recipes = create_recipes(cls.author, 3, ingredients)
+        create_recipes(cls.reader, 1)
+        update_totals(Recipe.objects.all())
+        Favorites.objects.create(user=cls.reader, recipe=recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=recipes[1])
+        Subscription.objects.create(user=cls.reader, follows=cls.author)
+
+    def assertSameJSON(self, request):
+        represented = self.represent(request)
+        self.assertEqual(len(represented), 4)
+        self.assertEqual(JSONRenderer().render(represented),
+                         JSONRenderer().render(self.serialize(request)))
+
+    def test_anonymous(self):
+        self.assertSameJSON(self.get_request())
+
+    def test_authenticated(self):
+        self.assertSameJSON(self.get_request(self.reader))
+        represented = self.represent(self.get_request(self.reader))
+        # Флаги и подписка действительно различаются у рецептов.
+        self.assertEqual(
+            sorted((recipe['is_favorited'], recipe['is_in_shopping_cart'],
+                    recipe['author']['is_subscribed'])
+                   for recipe in represented),
+            [(False, False, False), (False, False, True),
+             (False, True, True), (True, False, True)])
+
+    def test_field_order(self):
+        request = self.get_request()
+        recipe = Recipe.objects.first()
+        [represented] = represent_recipes(
+            list(Recipe.objects.filter(pk=recipe.pk).values(
+                *RECIPE_VALUES)), request)
+        serialized = RecipeSerializer(
+            recipe, context={'request': request}).data
+        self.assertEqual(list(represented), list(serialized))
+
+
+@benchmark
+class RepresentRecipesBenchmark(RepresentationMixin, BenchmarkMixin,
+                                TestCase):
+    """Скорость построения страницы из 100 рецептов."""
+
+    def test_recipe_page(self):
+        user = create_user(1)
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(10)
+        ])
+        create_recipes(user, 100, ingredients)
+        request = self.get_request(user)
+        serializer = self.measure('RecipeSerializer, 100 рецептов',
+                                  lambda: self.serialize(request), 20)
+        fast = self.measure('represent_recipes, 100 рецептов',
+                            lambda: self.represent(request), 20)
+        self.assertLess(fast, serializer)
@@ -0,0 +1,81 @@
+"""Короткие ссылки на рецепты."""
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.tests.utils import BenchmarkMixin, benchmark
+from recipes.models import Recipe, ShortLink
+from recipes.shortlinks import (encode_base62, get_short_link_code,
+                                resolve_short_link)
+from userprofile.models import UserProfile
+
+
+class ShortLinkTestMixin:
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.author = UserProfile.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Иванов')
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Суп', text='Сварить.',
+            cooking_time=10, image='recipes/images/soup.png')
+        self.client = APIClient()
+
+
+class ShortLinkTest(ShortLinkTestMixin, TestCase):
+    """Коды ссылок, их кеширование и сброс при удалении рецепта."""
+
+    def test_code_is_base62_of_recipe_id(self):
+        self.assertEqual(encode_base62(0), '0')
+        self.assertEqual(encode_base62(61), 'Z')
+        self.assertEqual(encode_base62(62), '10')
+        self.assertEqual(get_short_link_code(self.recipe.pk),
+                         encode_base62(self.recipe.pk))
+
+    def test_link_created_with_single_write(self):
+        with self.assertNumQueries(1):
+            code = get_short_link_code(self.recipe.pk)
+        with self.assertNumQueries(0):
+            get_short_link_code(self.recipe.pk)
+        self.assertEqual(ShortLink.objects.get().code, code)
+
+    def test_redirect_served_from_cache(self):
+        response = self.client.get(
+            f'/api/recipes/{self.recipe.pk}/get-link/')
+        url = response.json()['short-link']
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f'/recipes/{self.recipe.pk}')
+
+    def test_redirect_resolved_from_db_after_cache_miss(self):
+        code = get_short_link_code(self.recipe.pk)
+        cache.clear()
+        self.assertEqual(resolve_short_link(code), self.recipe.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_short_link(code), self.recipe.pk)
+
+    def test_unknown_code(self):
+        self.assertEqual(self.client.get('/s/zzz').status_code, 404)
+
+    def test_deleted_recipe_link_not_found(self):
+        code = get_short_link_code(self.recipe.pk)
+        self.assertEqual(self.client.get(f'/s/{code}').status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        self.assertEqual(self.client.get(f'/s/{code}').status_code, 404)
+
+
+@benchmark
+class ShortLinkBenchmark(BenchmarkMixin, ShortLinkTestMixin, TestCase):
+    """Скорость перенаправления по короткой ссылке."""
+
+    def test_redirect_throughput(self):
+        code = get_short_link_code(self.recipe.pk)
+        url = f'/s/{code}'
+        with self.assertNumQueries(0):
+            self.measure('Перенаправление /s/<code>',
+                         lambda: self.client.get(url), 2000)
+            self.measure('resolve_short_link из кеша',
+                         lambda: resolve_short_link(code), 100000)
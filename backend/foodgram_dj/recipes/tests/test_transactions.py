@@ -0,0 +1,142 @@
+"""Атомарность создания рецептов и очистка файлов картинок."""
+import base64
+import io
+import threading
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.signals import request_finished
+from django.db import connections, transaction
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from PIL import Image
+from rest_framework.test import APIClient
+from api.tests.utils import MediaTestMixin, create_user
+from image64conv.utils import atomic_with_files
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+UPLOAD_DIR = 'recipes/images'
+
+# Рецепты с таким началом названия падают после записи картинки.
+FAIL_PREFIX = 'Сбой'
+
+
+def make_image(color):
+    """Картинка PNG в base64; одинаковый color дает одинаковый файл."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2), color=color).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+class NestedTransactionFilesTest(MediaTestMixin, TransactionTestCase):
+    """Файлы из вложенного блока удаляются при откате внешней транзакции."""
+
+    def make_recipe(self):
+        return Recipe(
+            author=create_user(1), name='Суп', text='Сварить.',
+            cooking_time=10,
+            image=ContentFile(b'\x89PNG-test', name='recipes/images/a.png'))
+
+    def test_outer_rollback_deletes_file(self):
+        recipe = self.make_recipe()
+        with transaction.atomic():
+            with atomic_with_files(recipe, 'image'):
+                recipe.save()
+            self.assertEqual(self.stored_files(UPLOAD_DIR),
+                             {recipe.image.name})
+            transaction.set_rollback(True)
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(self.stored_files(UPLOAD_DIR), set())
+
+    def test_outer_commit_keeps_file(self):
+        recipe = self.make_recipe()
+        with transaction.atomic():
+            with atomic_with_files(recipe, 'image'):
+                recipe.save()
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(self.stored_files(UPLOAD_DIR), {recipe.image.name})
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ParallelRecipeCreateTest(MediaTestMixin, TransactionTestCase):
+    """Параллельное создание рецептов не оставляет лишних файлов и строк."""
+
+    threads = 8
+
+    def setUp(self):
+        super().setUp()
+        self.users = [create_user(number)
+                      for number in range(self.threads)]
+        self.ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name='мука', measurement_unit='г'),
+            Ingredient(name='соль', measurement_unit='г'),
+        ])
+
+    def payload(self, name, color):
+        return {
+            'name': name,
+            'text': 'Смешать и запечь.',
+            'cooking_time': 30,
+            'image': make_image(color),
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 100}
+                for ingredient in self.ingredients
+            ],
+        }
+
+    def create_recipes(self, user, payloads, barrier, results):
+        # Исключения из представления сохраняются тестовым клиентом
+        # через общий сигнал, поэтому в потоках они не пробрасываются,
+        # а превращаются в ответ 500.
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        barrier.wait()
+        try:
+            for payload in payloads:
+                response = client.post('/api/recipes/', payload,
+                                       format='json')
+                results.append((payload['name'], response.status_code))
+        finally:
+            connections.close_all()
+
+    def test_no_orphans_or_partial_recipes(self):
+        bulk_create = IngredientRecipe.objects.bulk_create
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            if any(obj.recipe.name.startswith(FAIL_PREFIX) for obj in objs):
+                raise RuntimeError('сбой записи ингредиентов')
+            return bulk_create(objs, *args, **kwargs)
+
+        barrier = threading.Barrier(self.threads)
+        results = []
+        workers = []
+        for number, user in enumerate(self.users):
+            # Удачные рецепты делят картинки между собой и с половиной
+            # неудачных, у остальных неудачных картинки уникальные.
+            shared_color = (number % 4, 0, 0)
+            fail_color = shared_color if number % 2 else (200, number, 0)
+            payloads = [
+                self.payload(f'Пирог {number}', shared_color),
+                self.payload(f'{FAIL_PREFIX} {number}', fail_color),
+            ]
+            workers.append(threading.Thread(
+                target=self.create_recipes,
+                args=(user, payloads, barrier, results)))
+
+        with mock.patch.object(IngredientRecipe.objects, 'bulk_create',
+                               failing_bulk_create):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        created = {name for name, status in results if status == 201}
+        self.assertTrue(created)
+        self.assertFalse(any(name.startswith(FAIL_PREFIX)
+                             for name in created))
+        recipes = Recipe.objects.all()
+        self.assertEqual({recipe.name for recipe in recipes}, created)
+        for recipe in recipes:
+            self.assertEqual(recipe.recipe_ingredients.count(),
+                             len(self.ingredients))
+        self.assertEqual(self.stored_files(UPLOAD_DIR),
+                         {recipe.image.name for recipe in recipes})
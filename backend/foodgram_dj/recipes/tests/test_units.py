@@ -0,0 +1,105 @@
+"""Приведение единиц измерения и список покупок."""
+import csv
+from unittest import skipUnless
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from api.tests.utils import create_recipes, create_user
+from recipes.models import Ingredient, IngredientRecipe
+from recipes.units import (MASS, OTHER, PIECES, UNITS, VOLUME,
+                           aggregate_ingredients, build_shopping_list,
+                           format_amount)
+
+INGREDIENTS_CSV = settings.BASE_DIR.parent.parent / 'data' / 'ingredients.csv'
+
+
+def read_ingredients():
+    """Пары (название, единица) из data/ingredients.csv."""
+    with open(INGREDIENTS_CSV, encoding='utf-8') as file:
+        return [(name, unit) for name, unit in csv.reader(file)]
+
+
+class FormatAmountTest(SimpleTestCase):
+
+    def test_format_amount(self):
+        cases = [
+            ((999, 'г'), ('999', 'г')),
+            ((1000, 'г'), ('1', 'кг')),
+            ((2600, 'г'), ('2,6', 'кг')),
+            ((1500, 'мл'), ('1,5', 'л')),
+            ((1001, 'мл'), ('1,001', 'л')),
+            ((3000, 'шт.'), ('3000', 'шт.')),
+            ((5, 'ч. л.'), ('5', 'ч. л.')),
+        ]
+        for (total, unit), expected in cases:
+            with self.subTest(total=total, unit=unit):
+                self.assertEqual(format_amount(total, unit), expected)
+
+
+@skipUnless(INGREDIENTS_CSV.exists(), 'нет файла data/ingredients.csv')
+class IngredientUnitsTest(TestCase):
+    """Единицы из справочника ингредиентов проекта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create([
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in read_ingredients()
+        ])
+        # По одному ингредиенту на каждую единицу справочника.
+        cls.by_unit = {}
+        for ingredient in Ingredient.objects.order_by('pk'):
+            cls.by_unit.setdefault(ingredient.measurement_unit, ingredient)
+        [cls.recipe] = create_recipes(create_user(1), 1)
+
+    def test_main_units_known(self):
+        self.assertEqual(UNITS['г'][2], MASS)
+        self.assertEqual(UNITS['мл'][2], VOLUME)
+        self.assertEqual(UNITS['шт.'][2], PIECES)
+        self.assertTrue({'г', 'мл', 'шт.'} <= self.by_unit.keys())
+
+    def test_every_unit_has_section(self):
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(recipe=self.recipe, ingredient=ingredient,
+                             amount=10)
+            for ingredient in self.by_unit.values()
+        ])
+        sections = dict(build_shopping_list(
+            aggregate_ingredients(IngredientRecipe.objects.all())))
+        found = {}
+        for category, items in sections.items():
+            for name, amount, unit in items:
+                found[name] = (category, amount, unit)
+        for unit, ingredient in self.by_unit.items():
+            with self.subTest(unit=unit):
+                if unit in UNITS:
+                    base, _, category = UNITS[unit]
+                    expected = (category, '10', base)
+                else:
+                    # Неизвестная единица не переводится и не
+                    # смешивается с другими.
+                    expected = (OTHER, '10', unit)
+                self.assertEqual(found[ingredient.name], expected)
+
+    def test_variants_merged(self):
+        milk = self.by_unit['мл']
+        flour = self.by_unit['г']
+        extra = Ingredient.objects.bulk_create([
+            Ingredient(name=flour.name, measurement_unit='кг'),
+            Ingredient(name=flour.name, measurement_unit=' г. '),
+            Ingredient(name=milk.name, measurement_unit='л'),
+        ])
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(recipe=self.recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in zip([flour, milk, *extra],
+                                          [500, 300, 2, 100, 1])
+        ])
+        rows = list(aggregate_ingredients(IngredientRecipe.objects.all()))
+        self.assertEqual(
+            sorted((row['name'], row['unit'], row['total'])
+                   for row in rows),
+            sorted([(flour.name, 'г', 2600), (milk.name, 'мл', 1300)]))
+        self.assertEqual(build_shopping_list(rows), [
+            (MASS, [(flour.name, '2,6', 'кг')]),
+            (VOLUME, [(milk.name, '1,3', 'л')]),
+        ])
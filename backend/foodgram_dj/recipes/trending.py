@@ -0,0 +1,93 @@
+"""
+Популярность рецептов с экспоненциальным затуханием.
+
+Каждое добавление в избранное или в список покупок дает рецепту вклад
+weight * 0.5 ** (возраст / HALF_LIFE_HOURS). Оценки хранятся в
+TrendingScore и обновляются инкрементально: за один проход все оценки
+умножаются на коэффициент затухания за прошедшее время (один UPDATE),
+и к ним прибавляются вклады только новых добавлений — после момента,
+сохраненного в TrendingState.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Favorites, ShoppingCart, TrendingScore, TrendingState
+
+TRENDING_SETTINGS = {
+    # Время, за которое вклад добавления уменьшается вдвое.
+    'HALF_LIFE_HOURS': 24,
+    'FAVORITE_WEIGHT': 1.0,
+    'CART_WEIGHT': 0.5,
+    # Рецепты с меньшей оценкой удаляются из таблицы.
+    'MIN_SCORE': 0.01,
+    # Добавления моложе этого числа секунд ждут следующего запуска:
+    # их транзакции могли еще не завершиться.
+    'LAG_SECONDS': 5,
+    **getattr(settings, 'TRENDING', {}),
+}
+
+
+def decay_factor(seconds):
+    """Во сколько раз уменьшается оценка за seconds секунд."""
+    half_life = TRENDING_SETTINGS['HALF_LIFE_HOURS'] * 3600
+    return 0.5 ** (seconds / half_life)
+
+
+def collect_increments(since, until):
+    """Вклады добавлений из [since, until) на момент until по рецептам."""
+    increments = defaultdict(float)
+    for model, weight in ((Favorites, 'FAVORITE_WEIGHT'),
+                          (ShoppingCart, 'CART_WEIGHT')):
+        weight = TRENDING_SETTINGS[weight]
+        for recipe_id, created_at in model.objects.filter(
+            created_at__gte=since, created_at__lt=until
+        ).values_list('recipe_id', 'created_at').iterator():
+            age = (until - created_at).total_seconds()
+            increments[recipe_id] += weight * decay_factor(age)
+    return increments
+
+
+def update_trending():
+    """
+    Обновляет оценки популярности; возвращает (момент, число рецептов).
+
+    Расчет выполняется в одной транзакции и блокирует строку
+    TrendingState, поэтому параллельные запуски не учтут добавления
+    дважды.
+    """
+    until = timezone.now() - timedelta(
+        seconds=TRENDING_SETTINGS['LAG_SECONDS'])
+    with transaction.atomic():
+        state = TrendingState.objects.select_for_update().first()
+        if state is None:
+            # Первый запуск: добавления старше 10 периодов полураспада
+            # дают меньше 0.1% вклада.
+            state = TrendingState(processed_until=until - timedelta(
+                hours=10 * TRENDING_SETTINGS['HALF_LIFE_HOURS']))
+        since = state.processed_until
+        if since >= until:
+            return since, 0
+
+        TrendingScore.objects.update(score=F('score') * decay_factor(
+            (until - since).total_seconds()))
+        increments = collect_increments(since, until)
+        current = dict(TrendingScore.objects.filter(
+            recipe_id__in=increments).values_list('recipe_id', 'score'))
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(recipe_id=recipe_id,
+                           score=current.get(recipe_id, 0) + increment)
+             for recipe_id, increment in increments.items()],
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=['score'],
+            batch_size=1000,
+        )
+        TrendingScore.objects.filter(
+            score__lt=TRENDING_SETTINGS['MIN_SCORE']).delete()
+
+        state.processed_until = until
+        state.save()
+    return until, len(increments)
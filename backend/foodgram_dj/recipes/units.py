@@ -0,0 +1,95 @@
+"""
+Единицы измерения и сборка списка покупок.
+
+Один продукт может быть заведен с разными единицами (г и кг, мл и л).
+При сборке списка количество переводится в базовую единицу и
+суммируется в одном SQL-запросе, затем список разбивается на разделы
+по виду единицы и сортируется по названию.
+"""
+from django.db.models import Case, CharField, F, Sum, Value, When
+from django.db.models.functions import Lower, Trim
+
+# Раздел списка покупок для каждой базовой единицы.
+MASS, VOLUME, PIECES, OTHER = (
+    'Весовые продукты', 'Жидкости', 'Штучные продукты', 'Прочее')
+CATEGORIES = (MASS, VOLUME, PIECES, OTHER)
+
+# Написание единицы: (базовая единица, множитель, раздел).
+UNITS = {
+    'г': ('г', 1, MASS),
+    'г.': ('г', 1, MASS),
+    'гр': ('г', 1, MASS),
+    'гр.': ('г', 1, MASS),
+    'кг': ('г', 1000, MASS),
+    'кг.': ('г', 1000, MASS),
+    'мл': ('мл', 1, VOLUME),
+    'мл.': ('мл', 1, VOLUME),
+    'л': ('мл', 1000, VOLUME),
+    'л.': ('мл', 1000, VOLUME),
+    'шт': ('шт.', 1, PIECES),
+    'шт.': ('шт.', 1, PIECES),
+}
+
+# Крупная единица, в которой выводится большое количество.
+LARGER_UNITS = {'г': ('кг', 1000), 'мл': ('л', 1000)}
+
+CATEGORY_BY_UNIT = {base: category for base, _, category in UNITS.values()}
+
+
+def aggregate_ingredients(queryset):
+    """
+    Суммы ингредиентов в базовых единицах.
+
+    queryset — связи IngredientRecipe; возвращает строки с ключами
+    name, unit и total, отсортированные по названию (один запрос).
+    """
+    unit = Lower(Trim('ingredient__measurement_unit'))
+    return queryset.annotate(raw_unit=unit).annotate(
+        name=F('ingredient__name'),
+        unit=Case(
+            *(When(raw_unit=alias, then=Value(base))
+              for alias, (base, _, _) in UNITS.items()),
+            default=F('ingredient__measurement_unit'),
+            output_field=CharField(),
+        ),
+    ).values('name', 'unit').annotate(total=Sum(
+        F('amount') * Case(
+            *(When(raw_unit=alias, then=Value(factor))
+              for alias, (_, factor, _) in UNITS.items() if factor != 1),
+            default=Value(1),
+        )
+    )).order_by('name', 'unit')
+
+
+def format_amount(total, unit):
+    """Количество для вывода: 1500 г — «1,5 кг»."""
+    larger = LARGER_UNITS.get(unit)
+    if larger and total >= larger[1]:
+        unit = larger[0]
+        total = total / larger[1]
+        text = f'{total:.3f}'.rstrip('0').rstrip('.').replace('.', ',')
+    else:
+        text = str(total)
+    return text, unit
+
+
+def build_shopping_list(rows):
+    """Разделы списка покупок: [(раздел, [(название, кол-во, ед.)])]."""
+    sections = {category: [] for category in CATEGORIES}
+    for row in rows:
+        amount, unit = format_amount(row['total'], row['unit'])
+        sections[CATEGORY_BY_UNIT.get(row['unit'], OTHER)].append(
+            (row['name'], amount, unit))
+    return [(category, items) for category, items in sections.items()
+            if items]
+
+
+def render_shopping_list(sections):
+    """Текст списка покупок по разделам."""
+    lines = []
+    for category, items in sections:
+        lines.append(f'{category}:')
+        lines.extend(f'  {name} - {amount} {unit}'
+                     for name, amount, unit in items)
+        lines.append('')
+    return '\n'.join(lines)
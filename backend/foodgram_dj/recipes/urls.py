@@ -1,9 +1,9 @@
 """Шаблоны URL для приложения recipes."""
-from django.urls import include, path, re_path
+from django.urls import include, path
 from rest_framework import routers
-from django_short_url import views as surl_views
 
 from .views import (IngredientViewSet,
+                    MealPlanViewSet,
                     RecipeViewSet,
                     SubscriptionViewSet,
                     SingleSubscriptionViewSet)
@@ -12,13 +12,12 @@ from .views import (IngredientViewSet,
 router = routers.DefaultRouter()
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 router.register(r'ingredients', IngredientViewSet)
+router.register(r'meal-plan', MealPlanViewSet, basename='meal-plan')
 router.register(r'users/subscriptions',
                 SubscriptionViewSet,
                 basename='subscriptions')
 router.register(r'users', SingleSubscriptionViewSet, basename='users')
 
 urlpatterns = [
-    re_path(r's/^(?P<surl>\w+)', surl_views.short_url_redirect,
-            name='short_url_redirect'),
     path('', include(router.urls)),
 ]
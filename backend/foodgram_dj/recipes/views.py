@@ -1,31 +1,73 @@
 """Представления для приложения dishes."""
+from datetime import timedelta
 from io import BytesIO
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, Http404, HttpResponseRedirect
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import (viewsets, permissions, filters,
                             status, mixins, pagination)
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django_short_url.models import ShortURL
-from django_short_url.views import get_surl
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import (Recipe, Ingredient, ShoppingCart,
-                     IngredientRecipe, Favorites)
-from .serializers import (IngredientSerializer,
+                     IngredientRecipe, Favorites, MealPlanEntry)
+from .serializers import (IngredientSerializer, MealPlanEntrySerializer,
                           RecipeSerializer, ShortRecipeSerializer,
-                          SubscriptionSerializer)
+                          SubscriptionSerializer, RecipeIdListSerializer)
 from .permissions import AuthorOrReadOnly
 from .filters import RecipeFilter
+from .representations import RECIPE_VALUES, represent_recipes
+from .shortlinks import get_short_link_code, resolve_short_link
+from .units import (aggregate_ingredients, build_shopping_list,
+                    render_shopping_list)
+from userprofile.graph import get_mutual_follows, get_suggested_authors
 from userprofile.models import Subscription
+from userprofile.serializers import UserProfileSerializer
+from api.db_routing import ReplicaReadMixin
+from api.fieldsets import (get_requested_fields, is_field_expanded,
+                           is_field_requested)
 
 
 User = get_user_model()
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+def shopping_list_response(ingredient_recipes, filename):
+    """
+    Файл со списком покупок по связям рецептов с ингредиентами.
+
+    Количества суммируются одним запросом (см. recipes.units).
+    """
+    cart_items = list(aggregate_ingredients(ingredient_recipes))
+
+    if not cart_items:
+        return Response({
+            'message': 'Ваша корзина покупок пуста',
+            'status': 'success'
+        }, status=status.HTTP_200_OK)
+
+    # Формируем текстовый файл
+    file_content = BytesIO()
+    file_content.write(render_shopping_list(
+        build_shopping_list(cart_items)).encode('utf-8'))
+
+    # Подготавливаем файл для скачивания
+    file_content.seek(0)
+    return FileResponse(
+        file_content,
+        content_type='text/plain',
+        as_attachment=True,
+        filename=filename
+    )
+
+
+class IngredientViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Представление для получения одного ингредиента или списка по поиску."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -34,6 +76,7 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     filterset_fields = ('name', )
     search_fields = ('^name', )
+    throttle_scope = 'ingredients'
 
     def get_queryset(self):
         """Метод для получения ингредиентов по имени"""
@@ -43,7 +86,7 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
         return self.queryset
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Представление для получения рецепта."""
     serializer_class = RecipeSerializer
     pagination_class = LimitOffsetPagination
@@ -52,45 +95,138 @@ class RecipeViewSet(viewsets.ModelViewSet):
     search_fields = ('^name',)
     filterset_fields = ('name', )
     filterset_class = RecipeFilter
+    throttle_scope = None
 
     def get_queryset(self):
-        """Получение списка объектов."""
-        return Recipe.objects.select_related('author').prefetch_related(
-            'recipe_ingredients__ingredient',
-            'user_favs',
-            'shopping_carts'
-        ).order_by('-created_at')
+        """
+        Получение списка объектов.
+
+        Связанные данные загружаются только для полей, запрошенных
+        через ?fields= (по умолчанию — для всех).
+        """
+        request = self.request
+        queryset = Recipe.objects.order_by('-created_at')
+        if is_field_expanded(request, 'author'):
+            queryset = queryset.select_related('author')
+        if is_field_requested(request, 'ingredients'):
+            queryset = queryset.prefetch_related(
+                'recipe_ingredients__ingredient')
+        if not is_field_requested(request, 'text'):
+            queryset = queryset.defer('text')
+
+        user = request.user
+        if user.is_authenticated:
+            if is_field_requested(request, 'is_favorited'):
+                queryset = queryset.annotate(_is_favorited=Exists(
+                    Favorites.objects.filter(
+                        recipe=OuterRef('pk'), user=user)))
+            if is_field_requested(request, 'is_in_shopping_cart'):
+                queryset = queryset.annotate(_is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        recipe=OuterRef('pk'), user=user)))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов."""
+        return self.list_recipes(self.filter_queryset(self.get_queryset()))
+
+    def list_recipes(self, queryset):
+        """
+        Пагинированный список рецептов queryset.
+
+        Полное представление строится из строк .values() без
+        RecipeSerializer (см. recipes.representations).
+        """
+        request = self.request
+        if get_requested_fields(request) is not None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        queryset = queryset.prefetch_related(None).values(
+            *RECIPE_VALUES,
+            *(name for name in ('_is_favorited', '_is_in_shopping_cart')
+              if name in queryset.query.annotations)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                represent_recipes(page, request))
+        return Response(represent_recipes(list(queryset), request))
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Популярные рецепты по недавним добавлениям в избранное
+        и списки покупок (см. recipes.trending).
+        """
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            trending_score__isnull=False
+        ).order_by('-trending_score__score', 'pk')
+        return self.list_recipes(queryset)
+
+    def get_throttles(self):
+        """Ограничение частоты создания и изменения рецептов."""
+        if self.action in ('create', 'update', 'partial_update', 'destroy'):
+            self.throttle_scope = 'recipe_write'
+        return super().get_throttles()
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @action(detail=True, methods=['get'], url_path='get-link')
-    def get_short_link(self, request, pk=None):
-        """Получение короткой ссылки."""
-        recipe = self.get_object()
-        if not recipe:
-            return Response(
-                {'detail': 'Страница не найдена.'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Создаем полный URL для рецепта
-        full_url = request.build_absolute_uri(recipe.get_absolute_url())
+    def bulk_add_or_remove(self, request, model):
+        """
+        Пакетное добавление рецептов в список пользователя или удаление.
 
-        short_url, created = ShortURL.objects.get_or_create(lurl=full_url)
+        Все изменения выполняются одним запросом на вставку
+        или удаление внутри одной транзакции; для каждого id
+        возвращается результат операции.
+        """
+        serializer = RecipeIdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        user = request.user
 
-        if created or not short_url.surl:
-            short_url.surl = get_surl(short_url.id)  # Генерируем короткий URL
-            short_url.save()
+        with transaction.atomic():
+            existing = set(Recipe.objects.filter(
+                pk__in=recipe_ids).values_list('pk', flat=True))
+            present = set(model.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).values_list('recipe_id', flat=True))
+
+            if request.method == 'POST':
+                model.objects.bulk_create(
+                    [model(user=user, recipe_id=pk) for pk in recipe_ids
+                     if pk in existing and pk not in present],
+                    ignore_conflicts=True
+                )
+                done, skipped = 'added', 'already_exists'
+            else:
+                if present:
+                    model.objects.filter(
+                        user=user, recipe_id__in=present).delete()
+                done, skipped = 'removed', 'not_present'
+
+        results = []
+        for pk in recipe_ids:
+            if pk not in existing:
+                result = 'not_found'
+            elif (pk in present) == (request.method == 'POST'):
+                result = skipped
+            else:
+                result = done
+            results.append({'id': pk, 'status': result})
+        return Response({'results': results}, status=status.HTTP_200_OK)
 
-        if not short_url.surl:
-            return Response({'detail':
-                             'Не удалось сгенерировать короткую ссылку!'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        scheme = 'https' if request.is_secure() else 'http'
-        domain = request.get_host()
+    @action(detail=True, methods=['get'], url_path='get-link')
+    def get_short_link(self, request, pk=None):
+        """Получение короткой ссылки."""
+        recipe = get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        code = get_short_link_code(recipe.pk)
         short_link = request.build_absolute_uri(
-            f'{scheme}://{domain}{short_url.surl}')
+            reverse('short_link_redirect', kwargs={'code': code}))
 
         return Response({
             'short-link': short_link
@@ -99,7 +235,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(detail=True,
             methods=['post', 'delete'],
             url_path='shopping_cart',
-            permission_classes=[permissions.IsAuthenticated])
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='toggles')
     def post_delete_shopping_cart(self, request, pk=None):
         """Добавление рецепта в Корзину или удаление."""
         recipe = get_object_or_404(Recipe, pk=pk)
@@ -135,6 +272,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False,
+            methods=['post', 'delete'],
+            url_path='bulk_shopping_cart',
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='toggles')
+    def bulk_shopping_cart(self, request):
+        """Добавление списка рецептов в Корзину или удаление."""
+        return self.bulk_add_or_remove(request, ShoppingCart)
+
     @action(detail=False,
             methods=['get'],
             url_path='download_shopping_cart',
@@ -143,50 +289,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Скачивание текстового файла со списком покупок."""
         user = request.user
 
-        # Получаем все ингредиенты из корзины с суммированием количества
-        cart_items = IngredientRecipe.objects.filter(
-            recipe__shopping_carts__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(
-            total_amount=Sum('amount')
-        ).order_by('ingredient__name')
-
-        if not cart_items.exists():
-            return Response({
-                'message': 'Ваша корзина покупок пуста',
-                'status': 'success'
-            }, status=status.HTTP_200_OK)
-
-        # Формируем текстовый файл
-        file_content = BytesIO()
-
-        line = ''
-
-        for item in cart_items:
-            line += (
-                f"{item['ingredient__name']} - "
-                f"{item['total_amount']} "
-                f"{item['ingredient__measurement_unit']}\n"
-            )
-        file_content.write(line.encode('utf-8'))
-
-        # Подготавливаем файл для скачивания
-        file_content.seek(0)
-        response = FileResponse(
-            file_content,
-            content_type='text/plain',
-            as_attachment=True,
-            filename='shopping_list.txt'
+        # Ингредиенты из корзины, суммированные в базовых единицах
+        # (см. recipes.units).
+        return shopping_list_response(
+            IngredientRecipe.objects.filter(
+                recipe__shopping_carts__user=user),
+            'shopping_list.txt'
         )
 
-        return response
-
     @action(detail=True,
             methods=['post', 'delete'],
             url_path='favorite',
-            permission_classes=[permissions.IsAuthenticated])
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='toggles')
     def post_delete_favorite(self, request, pk=None):
         """Добавление рецепта в закладки или удаление."""
         recipe = get_object_or_404(Recipe, pk=pk)
@@ -221,8 +336,18 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False,
+            methods=['post', 'delete'],
+            url_path='bulk_favorite',
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='toggles')
+    def bulk_favorite(self, request):
+        """Добавление списка рецептов в Избранное или удаление."""
+        return self.bulk_add_or_remove(request, Favorites)
+
 
-class SubscriptionViewSet(viewsets.GenericViewSet,
+class SubscriptionViewSet(ReplicaReadMixin,
+                          viewsets.GenericViewSet,
                           mixins.ListModelMixin):
     """Представление для подписки."""
     serializer_class = SubscriptionSerializer
@@ -249,12 +374,30 @@ class SubscriptionViewSet(viewsets.GenericViewSet,
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def list_users(self, queryset):
+        """Пагинированный список пользователей без их рецептов."""
+        page = self.paginate_queryset(queryset)
+        serializer = UserProfileSerializer(
+            page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def mutual(self, request):
+        """Пользователи, с которыми оформлена взаимная подписка."""
+        return self.list_users(get_mutual_follows(request.user))
+
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request):
+        """Авторы, рекомендуемые для подписки."""
+        return self.list_users(get_suggested_authors(request.user))
+
 
 class SingleSubscriptionViewSet(viewsets.GenericViewSet):
     """Вывод пользователя, на которого оформлена подписка."""
     queryset = User.objects.all()
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'toggles'
 
     @action(detail=True, methods=['post', 'delete'], url_path='subscribe')
     def sub_and_unsub(self, request, pk=None):
@@ -266,17 +409,112 @@ class SingleSubscriptionViewSet(viewsets.GenericViewSet):
                 return Response({'detail':
                                  'Нельзя подписаться на самого себя!'},
                                 status=status.HTTP_400_BAD_REQUEST)
-            sub, created = Subscription.objects.get_or_create(
-                user=request.user, follows=to_sub)
+            # Подписка и счетчики пользователей (см. userprofile.counters)
+            # меняются в одной транзакции.
+            with transaction.atomic():
+                sub, created = Subscription.objects.get_or_create(
+                    user=request.user, follows=to_sub)
             if not created:
                 return Response({'detail': 'Подписка уже есть!'},
                                 status=status.HTTP_400_BAD_REQUEST)
+            to_sub.refresh_from_db(fields=['followers_count'])
             serializer = self.get_serializer(to_sub)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        count, _ = Subscription.objects.filter(user=request.user,
-                                               follows=to_sub).delete()
+        with transaction.atomic():
+            count, _ = Subscription.objects.filter(
+                user=request.user, follows=to_sub).delete()
         if count == 0:
             return Response({'detail': 'Ошибка отписки: не был подписан!'},
                             status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MealPlanViewSet(ReplicaReadMixin,
+                      mixins.CreateModelMixin,
+                      mixins.DestroyModelMixin,
+                      viewsets.GenericViewSet):
+    """
+    План питания пользователя по дням недели.
+
+    Неделя задается параметром ?week= (любой ее день в формате
+    ГГГГ-ММ-ДД), по умолчанию — текущая.
+    """
+    serializer_class = MealPlanEntrySerializer
+    pagination_class = None
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        return MealPlanEntry.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def get_week(self):
+        """Первый и последний день запрошенной недели."""
+        value = self.request.query_params.get('week')
+        try:
+            day = parse_date(value) if value else timezone.localdate()
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError(
+                {'week': 'Укажите дату в формате ГГГГ-ММ-ДД.'})
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+
+    def list(self, request):
+        """
+        План на неделю по дням.
+
+        Рецепты всех дней загружаются вместе, поэтому число запросов
+        не зависит от размера плана.
+        """
+        start, end = self.get_week()
+        entries = list(self.get_queryset().filter(
+            date__range=(start, end)
+        ).values_list('id', 'date', 'recipe_id'))
+
+        user = request.user
+        rows = Recipe.objects.filter(
+            pk__in={recipe_id for _, _, recipe_id in entries}
+        ).annotate(
+            _is_favorited=Exists(Favorites.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+            _is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+        ).values(*RECIPE_VALUES, '_is_favorited', '_is_in_shopping_cart')
+        recipes = {recipe['id']: recipe
+                   for recipe in represent_recipes(list(rows), request)}
+
+        days = {start + timedelta(days=offset): []
+                for offset in range(7)}
+        for entry_id, date, recipe_id in entries:
+            days[date].append({'id': entry_id, 'recipe': recipes[recipe_id]})
+        return Response({
+            'week_start': start,
+            'week_end': end,
+            'days': [{'date': date, 'entries': day_entries}
+                     for date, day_entries in days.items()],
+        })
+
+    @action(detail=False, methods=['get'])
+    def shopping_list(self, request):
+        """Список покупок на неделю плана одним файлом."""
+        start, end = self.get_week()
+        # Оба условия в одном filter(): каждая запись плана дает свою
+        # копию ингредиентов рецепта, и повторы рецепта суммируются.
+        return shopping_list_response(
+            IngredientRecipe.objects.filter(
+                recipe__meal_plan_entries__user=request.user,
+                recipe__meal_plan_entries__date__range=(start, end)),
+            f'shopping_list_{start:%Y-%m-%d}.txt'
+        )
+
+
+def short_link_redirect(request, code):
+    """Перенаправление с короткой ссылки на страницу рецепта."""
+    recipe_id = resolve_short_link(code)
+    if recipe_id is None:
+        raise Http404('Короткая ссылка не найдена.')
+    return HttpResponseRedirect(f'/recipes/{recipe_id}')
@@ -1,6 +1,7 @@
 """Настройка админ-зоны для приложения userorofile."""
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from api.paginators import EstimatedCountPaginator
 from .models import UserProfile, Subscription
 
 
@@ -9,6 +10,7 @@ class SubscriptionInline(admin.StackedInline):
     model = Subscription
     fk_name = 'user'
     extra = 1
+    autocomplete_fields = ('follows',)
     verbose_name = 'Подписка'
     verbose_name_plural = 'Подписки'
 
@@ -25,9 +27,12 @@ class SubscriptionInline(admin.StackedInline):
 @admin.register(UserProfile)
 class UserProfileAdmin(UserAdmin):
     """Настройки админки для модели пользователя."""
-    list_display = ('username', 'email', 'first_name', 'last_name')
+    list_display = ('username', 'email', 'first_name', 'last_name',
+                    'followers_count', 'recipes_count')
     search_fields = ('username', 'email')
-    list_filter = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
     inlines = (SubscriptionInline,)
@@ -8,3 +8,16 @@ class UserProfileConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'userprofile'
     verbose_name = 'Профиль пользователя'
+
+    def ready(self):
+        """
+        Подключение очистки файлов аватаров, сброса кеша токенов
+        и счетчиков пользователя.
+        """
+        from image64conv.cleanup import track_file_fields
+        from .counters import connect_counters
+        from .models import UserProfile
+        from . import authentication  # noqa: F401
+
+        track_file_fields(UserProfile, 'avatar')
+        connect_counters()
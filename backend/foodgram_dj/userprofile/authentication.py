@@ -0,0 +1,168 @@
+"""Аутентификация по токену с кешированием пользователя."""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from api.caches import get_shared_cache
+
+User = get_user_model()
+
+# Настройки кеша: размер и время жизни локального LRU-кеша процесса
+# и время жизни записей в общем кеше (в секундах). Если кеш по
+# умолчанию общий для процессов (см. CACHES), используется только он,
+# иначе — только локальный кеш.
+CACHE_SETTINGS = {
+    'LOCAL_MAXSIZE': 1024,
+    'LOCAL_TIMEOUT': 5,
+    'SHARED_TIMEOUT': 300,
+    **getattr(settings, 'TOKEN_AUTH_CACHE', {}),
+}
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кеш с ограничением размера и времени жизни."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Значение по ключу или None, если его нет или оно устарело."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Удаляет все записи, значения которых удовлетворяют predicate."""
+        with self._lock:
+            for key in [key for key, (value, _) in self._data.items()
+                        if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LRUCache(CACHE_SETTINGS['LOCAL_MAXSIZE'],
+                       CACHE_SETTINGS['LOCAL_TIMEOUT'])
+
+
+def token_cache_key(key):
+    return f'auth_token:{key}'
+
+
+def user_cache_key(user_id):
+    return f'auth_token_user:{user_id}'
+
+
+def invalidate_token(key):
+    """Удаляет токен из локального и общего кешей."""
+    local_cache.delete(key)
+    cache = get_shared_cache()
+    if cache is not None:
+        cache.delete(token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Удаляет из кешей все записи пользователя."""
+    local_cache.delete_matching(lambda user: user.pk == user_id)
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    key = cache.get(user_cache_key(user_id))
+    if key:
+        cache.delete_many([token_cache_key(key), user_cache_key(user_id)])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену без запроса к БД на каждый запрос.
+
+    Пользователь ищется в кеше и только потом в БД. Записи
+    сбрасываются при выходе из системы, смене пароля, деактивации
+    и любом другом изменении пользователя. Если кеш по умолчанию общий
+    для процессов, пользователь хранится только в нем: сброс записи
+    виден всем процессам сразу, а локальный кеш процесса продолжал бы
+    принимать отозванный токен. Без общего кеша используется LRU-кеш
+    процесса, записи которого в других процессах живут не дольше
+    LOCAL_TIMEOUT секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_shared_cache()
+        if cache is not None:
+            user = self.get_shared_user(cache, key)
+        else:
+            user = local_cache.get(key)
+            if user is None:
+                user = self.get_user_from_db(key)
+                local_cache.set(key, user)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        # Копия, чтобы изменения в одном запросе не попадали в кеш.
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
+
+    def get_shared_user(self, cache, key):
+        """Пользователь из общего кеша или из БД с записью в кеш."""
+        user = cache.get(token_cache_key(key))
+        if user is None:
+            user = self.get_user_from_db(key)
+            timeout = CACHE_SETTINGS['SHARED_TIMEOUT']
+            cache.set(token_cache_key(key), user, timeout)
+            cache.set(user_cache_key(user.pk), key, timeout)
+        return user
+
+    def get_user_from_db(self, key):
+        """Получение пользователя по токену из БД."""
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return token.user
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='token_cache_delete')
+def token_deleted(sender, instance, **kwargs):
+    """Сброс кеша при удалении токена (выход из системы)."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User, dispatch_uid='token_cache_user_save')
+@receiver(post_delete, sender=User, dispatch_uid='token_cache_user_delete')
+def user_changed(sender, instance, **kwargs):
+    """Сброс кеша при изменении пользователя (пароль, активность)."""
+    invalidate_user(instance.pk)
@@ -0,0 +1,85 @@
+"""
+Счетчики подписчиков, подписок и рецептов пользователя.
+
+Счетчики хранятся в полях UserProfile и меняются одним UPDATE в той же
+транзакции, что и запись подписки или рецепта, поэтому при выводе
+профилей не нужен COUNT для каждого пользователя. Расхождения, которые
+могут появиться при изменениях в обход ORM, исправляет команда
+reconcile_counters.
+"""
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+
+User = get_user_model()
+
+# Поле счетчика: (модель, поле внешнего ключа на пользователя).
+COUNTERS = {
+    'followers_count': ('userprofile.Subscription', 'follows'),
+    'following_count': ('userprofile.Subscription', 'user'),
+    'recipes_count': ('recipes.Recipe', 'author'),
+}
+
+
+def change_counter(user_id, field, delta):
+    """Атомарно изменяет счетчик пользователя на delta."""
+    User.objects.filter(pk=user_id).update(
+        **{field: Greatest(F(field) + delta, 0)})
+    # Пользователь мог быть закеширован при аутентификации.
+    from .authentication import invalidate_user
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+def count_subquery(field):
+    """Подзапрос, вычисляющий значение счетчика по связанной таблице."""
+    model_name, fk_name = COUNTERS[field]
+    model = apps.get_model(model_name)
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk_name: OuterRef('pk')})
+        .order_by().values(fk_name)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def with_actual_counts(queryset):
+    """Добавляет к пользователям фактические значения счетчиков."""
+    return queryset.annotate(**{
+        f'actual_{field}': count_subquery(field) for field in COUNTERS
+    })
+
+
+def subscription_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(instance.follows_id, 'followers_count', 1)
+        change_counter(instance.user_id, 'following_count', 1)
+
+
+def subscription_deleted(sender, instance, **kwargs):
+    change_counter(instance.follows_id, 'followers_count', -1)
+    change_counter(instance.user_id, 'following_count', -1)
+
+
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        change_counter(instance.author_id, 'recipes_count', 1)
+
+
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(instance.author_id, 'recipes_count', -1)
+
+
+def connect_counters():
+    """Подключает обновление счетчиков к сохранению и удалению записей."""
+    subscription = COUNTERS['followers_count'][0]
+    recipe = COUNTERS['recipes_count'][0]
+    post_save.connect(subscription_saved, sender=subscription,
+                      dispatch_uid='counters_subscription_save')
+    post_delete.connect(subscription_deleted, sender=subscription,
+                        dispatch_uid='counters_subscription_delete')
+    post_save.connect(recipe_saved, sender=recipe,
+                      dispatch_uid='counters_recipe_save')
+    post_delete.connect(recipe_deleted, sender=recipe,
+                        dispatch_uid='counters_recipe_delete')
@@ -0,0 +1,41 @@
+"""
+Запросы по графу подписок.
+
+Функции возвращают queryset, поэтому их можно пагинировать и
+обрабатывать страницами; каждая выполняется одним SQL-запросом
+независимо от числа пользователей.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef, Q
+from .models import Subscription
+
+User = get_user_model()
+
+
+def get_mutual_follows(user):
+    """Пользователи, с которыми user подписан друг на друга."""
+    return User.objects.filter(
+        Exists(Subscription.objects.filter(
+            user=user, follows=OuterRef('pk'))),
+        Exists(Subscription.objects.filter(
+            user=OuterRef('pk'), follows=user)),
+    ).order_by('username')
+
+
+def get_suggested_authors(user):
+    """
+    Авторы, на которых user может подписаться.
+
+    Выше стоят авторы, на которых подписано больше людей из подписок
+    user, затем — более популярные. Авторы без рецептов и те, на кого
+    подписка уже есть, не предлагаются.
+    """
+    followed = Subscription.objects.filter(user=user)
+    return User.objects.filter(recipes_count__gt=0).exclude(
+        pk=user.pk
+    ).exclude(
+        Exists(followed.filter(follows=OuterRef('pk')))
+    ).annotate(
+        common_followers=Count('subbed_to', filter=Q(
+            subbed_to__user__in=followed.values('follows')))
+    ).order_by('-common_followers', '-followers_count', 'pk')
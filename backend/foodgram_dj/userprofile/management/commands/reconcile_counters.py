@@ -0,0 +1,66 @@
+"""Команда для сверки счетчиков пользователей с данными в БД."""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from userprofile.authentication import invalidate_user
+from userprofile.counters import COUNTERS, count_subquery, with_actual_counts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает followers_count, following_count и recipes_count.
+
+    Пользователи обходятся пачками по возрастанию id; счетчики
+    обновляются только у тех, у кого они разошлись с фактическими
+    значениями, одним UPDATE с подзапросами на пачку.
+    """
+
+    help = 'Сверяет и исправляет счетчики подписчиков и рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество пользователей, проверяемых одним запросом.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести расхождения, ничего не меняя.')
+
+    def find_mismatched(self, batch):
+        """Id пользователей пачки с неверными счетчиками."""
+        mismatched = []
+        for row in with_actual_counts(
+                User.objects.filter(pk__in=batch)).values(
+                    'pk', *COUNTERS, *(f'actual_{f}' for f in COUNTERS)):
+            diff = {field: (row[field], row[f'actual_{field}'])
+                    for field in COUNTERS
+                    if row[field] != row[f'actual_{field}']}
+            if diff:
+                mismatched.append(row['pk'])
+                self.stdout.write(f'{row["pk"]}: ' + ', '.join(
+                    f'{field} {old} -> {new}'
+                    for field, (old, new) in diff.items()))
+        return mismatched
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            batch = list(User.objects.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+            mismatched = self.find_mismatched(batch)
+            if mismatched and not options['dry_run']:
+                User.objects.filter(pk__in=mismatched).update(**{
+                    field: count_subquery(field) for field in COUNTERS})
+                for pk in mismatched:
+                    invalidate_user(pk)
+            fixed += len(mismatched)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено пользователей: {checked}, '
+            f'{"найдено" if options["dry_run"] else "исправлено"} '
+            f'расхождений: {fixed}'))
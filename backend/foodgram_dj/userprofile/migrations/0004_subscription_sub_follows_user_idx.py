@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0003_alter_userprofile_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['follows', 'user'], name='sub_follows_user_idx'),
+        ),
+    ]
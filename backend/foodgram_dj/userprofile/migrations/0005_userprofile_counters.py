@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """Заполнение счетчиков по существующим подпискам и рецептам."""
+    UserProfile = apps.get_model('userprofile', 'UserProfile')
+    Subscription = apps.get_model('userprofile', 'Subscription')
+    Recipe = apps.get_model('recipes', 'Recipe')
+
+    def count(model, field):
+        return Coalesce(Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field)
+            .annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    UserProfile.objects.update(
+        followers_count=count(Subscription, 'follows'),
+        following_count=count(Subscription, 'user'),
+        recipes_count=count(Recipe, 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0004_subscription_sub_follows_user_idx'),
+        ('recipes', '0008_shortlink'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписок'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 """Модель профиля пользователя, списка покупок и избранного."""
 from re import match
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from rest_framework.validators import ValidationError
 
@@ -45,6 +47,24 @@ class UserProfile(AbstractUser):
         null=True,
         default=None
     )
+
+    # Счетчики поддерживаются в userprofile.counters и сверяются
+    # командой reconcile_counters.
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        editable=False
+    )
+    following_count = models.PositiveIntegerField(
+        'Подписок',
+        default=0,
+        editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов',
+        default=0,
+        editable=False
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'username',
@@ -56,6 +76,12 @@ class UserProfile(AbstractUser):
     class Meta(AbstractUser.Meta):
         # Метаданные.
         db_table = 'auth_user'
+        indexes = [
+            # Поиск по началу username без учета регистра
+            # (username__istartswith).
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'),
+                         name='user_username_upper_idx'),
+        ]
         verbose_name = 'профиль пользователя'
         verbose_name_plural = 'Профили пользователей'
 
@@ -85,6 +111,11 @@ class Subscription(models.Model):
             models.UniqueConstraint(fields=['user', 'follows'],
                                     name="unique_subs")
         ]
+        indexes = [
+            # Поиск подписчиков автора (is_subscribed, список подписок).
+            models.Index(fields=['follows', 'user'],
+                         name='sub_follows_user_idx'),
+        ]
         verbose_name = 'подписка'
         verbose_name_plural = 'Подписки'
 
@@ -0,0 +1,16 @@
+"""Пагинация списка пользователей."""
+from rest_framework import pagination
+
+
+class UserCursorPagination(pagination.CursorPagination):
+    """
+    Постраничный вывод пользователей по ключу (keyset).
+
+    Следующая страница выбирается условием username > последнего
+    на странице по индексу уникального username, поэтому скорость
+    не зависит от номера страницы, а вставки не сдвигают страницы.
+    """
+
+    ordering = 'username'
+    page_size_query_param = 'limit'
+    max_page_size = 100
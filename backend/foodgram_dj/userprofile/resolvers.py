@@ -0,0 +1,54 @@
+"""
+Определение подписок текущего пользователя в пределах запроса.
+
+Резолвер хранится в объекте запроса и общий для всех сериализаторов:
+списки заранее передают ему id всех выводимых пользователей, и он
+загружает подписки на них одним запросом. Для пользователей, которых
+не передали заранее, подписка проверяется при первом обращении.
+"""
+from .models import Subscription
+
+
+class SubscriptionResolver:
+    """Подписки пользователя на других пользователей."""
+
+    def __init__(self, user):
+        self.user = user
+        self._subscribed = {}
+
+    @property
+    def is_active(self):
+        return self.user is not None and self.user.is_authenticated
+
+    def prefetch(self, user_ids):
+        """Загружает подписки на пользователей user_ids одним запросом."""
+        if not self.is_active:
+            return
+        missing = {pk for pk in user_ids
+                   if pk is not None and pk not in self._subscribed}
+        if not missing:
+            return
+        subscribed = set(Subscription.objects.filter(
+            user=self.user, follows_id__in=missing
+        ).values_list('follows_id', flat=True))
+        for pk in missing:
+            self._subscribed[pk] = pk in subscribed
+
+    def is_subscribed(self, user_id):
+        """Подписан ли пользователь запроса на пользователя user_id."""
+        if not self.is_active or user_id == self.user.pk:
+            return False
+        if user_id not in self._subscribed:
+            self.prefetch([user_id])
+        return self._subscribed[user_id]
+
+
+def get_subscription_resolver(request):
+    """Резолвер подписок для запроса; создается при первом обращении."""
+    if request is None:
+        return SubscriptionResolver(None)
+    resolver = getattr(request, '_subscription_resolver', None)
+    if resolver is None:
+        resolver = SubscriptionResolver(getattr(request, 'user', None))
+        request._subscription_resolver = resolver
+    return resolver
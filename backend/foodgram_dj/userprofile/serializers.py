@@ -1,11 +1,32 @@
 """Сериализаторы для модели профиля пользователя."""
+from django.db import models
 from rest_framework import serializers
+from api.fieldsets import SparseFieldsetMixin
 from image64conv.serializers import Base64ImageField
 from djoser.serializers import UserSerializer, UserCreateSerializer
-from .models import UserProfile, Subscription
+from .models import UserProfile
+from .resolvers import get_subscription_resolver
 
 
-class UserProfileSerializer(UserSerializer):
+def iter_instances(data):
+    """Объекты из данных списочного сериализатора."""
+    return data.all() if isinstance(data, models.manager.BaseManager) else data
+
+
+class UserListSerializer(serializers.ListSerializer):
+    """Список пользователей с загрузкой подписок одним запросом."""
+
+    def to_representation(self, data):
+        data = iter_instances(data)
+        request = self.context.get('request')
+        if request is not None and 'is_subscribed' in self.child.fields:
+            data = list(data)
+            get_subscription_resolver(request).prefetch(
+                user.pk for user in data)
+        return super().to_representation(data)
+
+
+class UserProfileSerializer(SparseFieldsetMixin, UserSerializer):
     """Сериализатор профиля пользователя."""
 
     is_subscribed = serializers.SerializerMethodField(
@@ -20,7 +41,10 @@ class UserProfileSerializer(UserSerializer):
         fields = ['id', 'email',
                   'username', 'first_name',
                   'last_name', 'is_subscribed',
-                  'avatar']
+                  'avatar', 'followers_count', 'following_count']
+        read_only_fields = UserSerializer.Meta.read_only_fields + (
+            'followers_count', 'following_count')
+        list_serializer_class = UserListSerializer
 
     def get_current_user(self):
         """Получение текущего авторизованного пользователя."""
@@ -33,12 +57,9 @@ class UserProfileSerializer(UserSerializer):
         Получает значение, подписан ли текущий пользователь на выбранного.
         """
         request = self.context.get('request')
-        if (not request
-           or not request.user.is_authenticated
-           or obj == request.user):
+        if not request:
             return False
-        return Subscription.objects.filter(user=request.user,
-                                           follows=obj).exists()
+        return get_subscription_resolver(request).is_subscribed(obj.pk)
 
 
 class UserProfileCreateSerializer(UserCreateSerializer):
@@ -0,0 +1,116 @@
+"""Аутентификация по токену с кешированием пользователя."""
+import shutil
+import tempfile
+from unittest import mock
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from userprofile.authentication import (CACHE_SETTINGS, LRUCache,
+                                       local_cache, token_cache_key)
+from userprofile.models import UserProfile
+
+ME_URL = '/api/users/me/'
+LOGOUT_URL = '/api/auth/token/logout/'
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
+class CachedTokenAuthenticationTest(TestCase):
+    """Кеширование пользователя и сброс кеша при выходе из системы."""
+
+    def setUp(self):
+        local_cache.clear()
+        caches['default'].clear()
+        self.user = UserProfile.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Иванов')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_user_needs_no_token_query(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_local_default_cache_is_not_used_as_shared(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertIsNone(
+            caches['default'].get(token_cache_key(self.token.key)))
+
+    def test_logout_invalidates_token(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertEqual(self.client.post(LOGOUT_URL).status_code, 204)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_deactivation_invalidates_user(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+
+class SharedCacheTokenAuthenticationTest(TestCase):
+    """Общий кеш: выход в одном процессе виден в остальных."""
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        # Файловый кеш, как и Redis, общий для всех процессов.
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        local_cache.clear()
+        # Локальные кеши двух процессов gunicorn.
+        self.workers = [LRUCache(CACHE_SETTINGS['LOCAL_MAXSIZE'],
+                                 CACHE_SETTINGS['LOCAL_TIMEOUT'])
+                        for _ in range(2)]
+        self.user = UserProfile.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Иванов')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_user_read_from_shared_cache(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertIsNotNone(
+            caches['default'].get(token_cache_key(self.token.key)))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_logout_clears_shared_cache(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.token.delete()
+        self.assertIsNone(
+            caches['default'].get(token_cache_key(self.token.key)))
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def as_worker(self, number):
+        """Запросы от имени процесса number со своим локальным кешем."""
+        return mock.patch('userprofile.authentication.local_cache',
+                          self.workers[number])
+
+    def test_logout_rejected_by_other_worker(self):
+        for number in range(2):
+            with self.as_worker(number):
+                self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.as_worker(0):
+            self.assertEqual(self.client.post(LOGOUT_URL).status_code, 204)
+        with self.as_worker(1):
+            self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_deactivation_rejected_by_other_worker(self):
+        for number in range(2):
+            with self.as_worker(number):
+                self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        with self.as_worker(0):
+            self.user.is_active = False
+            self.user.save()
+        with self.as_worker(1):
+            self.assertEqual(self.client.get(ME_URL).status_code, 401)
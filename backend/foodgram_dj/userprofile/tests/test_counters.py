@@ -0,0 +1,117 @@
+"""Счетчики подписчиков, подписок и рецептов пользователя."""
+import io
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.tests.utils import MediaTestMixin, create_recipes, create_user
+from recipes.models import Recipe
+from userprofile.counters import COUNTERS, with_actual_counts
+from userprofile.models import UserProfile
+
+
+class CountersMixin:
+
+    def assertCountersInStep(self):
+        """Счетчики всех пользователей равны числу записей в БД."""
+        for row in with_actual_counts(UserProfile.objects.all()).values(
+                'username', *COUNTERS, *(f'actual_{f}' for f in COUNTERS)):
+            for field in COUNTERS:
+                self.assertEqual(row[field], row[f'actual_{field}'],
+                                 f'{row["username"]}: {field}')
+
+    def get_counters(self, user):
+        return UserProfile.objects.values_list(*COUNTERS).get(pk=user.pk)
+
+
+class CountersTest(CountersMixin, MediaTestMixin, TestCase):
+    """Изменения через API сразу отражаются в счетчиках."""
+
+    def setUp(self):
+        super().setUp()
+        self.reader = create_user(1)
+        self.author = create_user(2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_follow_and_unfollow(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.get_counters(self.author), (1, 0, 0))
+        self.assertEqual(self.get_counters(self.reader), (0, 1, 0))
+        # Повторная подписка и отписка без подписки ничего не меняют.
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertCountersInStep()
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(self.get_counters(self.author), (0, 0, 0))
+        self.assertCountersInStep()
+
+    def test_recipes(self):
+        recipe = Recipe.objects.create(
+            author=self.reader, name='Суп', text='Сварить.',
+            cooking_time=10, image='recipes/images/soup.png')
+        Recipe.objects.create(
+            author=self.reader, name='Каша', text='Сварить.',
+            cooking_time=10, image='recipes/images/porridge.png')
+        self.assertEqual(self.get_counters(self.reader), (0, 0, 2))
+        self.assertEqual(
+            self.client.delete(f'/api/recipes/{recipe.pk}/').status_code,
+            204)
+        self.assertEqual(self.get_counters(self.reader), (0, 0, 1))
+        self.assertCountersInStep()
+
+    def test_favorite_and_cart_do_not_change_counters(self):
+        [recipe] = create_recipes(self.author, 1)
+        # Рецепт создан без сигналов, счетчики сверяются заранее.
+        call_command('reconcile_counters', stdout=io.StringIO())
+        for action in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{recipe.pk}/{action}/'
+            with self.subTest(action=action):
+                self.assertEqual(self.client.post(url).status_code, 201)
+                self.assertCountersInStep()
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertCountersInStep()
+
+    def test_deleted_user_updates_followers(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.reader.delete()
+        self.assertEqual(self.get_counters(self.author), (0, 0, 0))
+        self.assertCountersInStep()
+
+
+class ReconcileCountersTest(CountersMixin, TestCase):
+    """Команда reconcile_counters исправляет разошедшиеся счетчики."""
+
+    def setUp(self):
+        self.users = [create_user(number) for number in range(3)]
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        for user in self.users[1:]:
+            client.post(f'/api/users/{user.pk}/subscribe/')
+        # bulk_create не отправляет сигналов: счетчики рецептов отстают.
+        create_recipes(self.users[1], 2)
+        UserProfile.objects.filter(pk=self.users[2].pk).update(
+            followers_count=7, following_count=3)
+
+    def reconcile(self, *args):
+        output = io.StringIO()
+        call_command('reconcile_counters', '--batch-size', '2', *args,
+                     stdout=output)
+        return output.getvalue()
+
+    def test_dry_run_only_reports(self):
+        before = [self.get_counters(user) for user in self.users]
+        output = self.reconcile('--dry-run')
+        self.assertIn('recipes_count 0 -> 2', output)
+        self.assertIn('followers_count 7 -> 1', output)
+        self.assertIn('найдено расхождений: 2', output)
+        self.assertEqual([self.get_counters(user) for user in self.users],
+                         before)
+
+    def test_fixes_counters(self):
+        output = self.reconcile()
+        self.assertIn('исправлено расхождений: 2', output)
+        self.assertCountersInStep()
+        self.assertEqual(self.get_counters(self.users[1]), (1, 0, 2))
+        self.assertIn('исправлено расхождений: 0', self.reconcile())
@@ -0,0 +1,17 @@
+"""Проверка использования индексов подписок."""
+from django.test import TestCase
+from api.tests.utils import QueryPlanMixin
+from userprofile.models import Subscription, UserProfile
+
+
+class SubscriptionIndexesTest(QueryPlanMixin, TestCase):
+    """Поиск подписчиков автора использует индекс (follows, user)."""
+
+    def test_author_followers(self):
+        author = UserProfile.objects.create(
+            username='author', email='author@example.com',
+            first_name='Иван', last_name='Иванов')
+        self.assertUsesIndex(
+            Subscription.objects.filter(follows=author)
+            .order_by('user').values_list('user', flat=True),
+            'sub_follows_user_idx')
@@ -2,17 +2,46 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import pagination, permissions, status
 from djoser import views
+from api.db_routing import ReplicaReadMixin
 from .models import UserProfile
+from .pagination import UserCursorPagination
 from .serializers import UserProfileSerializer
 
 
-class UserProfileViewSet(views.UserViewSet):
+class UserProfileViewSet(ReplicaReadMixin, views.UserViewSet):
     """Представление профиля пользователя."""
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     pagination_class = pagination.LimitOffsetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, ]
 
+    def get_queryset(self):
+        """
+        Пользователи в порядке username.
+
+        Параметр ?username= ищет по началу имени без учета регистра
+        (индекс user_username_upper_idx).
+        """
+        queryset = super().get_queryset().order_by('username')
+        if self.action == 'list':
+            username = self.request.query_params.get('username')
+            if username:
+                queryset = queryset.filter(username__istartswith=username)
+        return queryset
+
+    @property
+    def paginator(self):
+        """
+        Пагинатор списка: с параметром ?cursor= — по ключу
+        (UserCursorPagination), иначе по limit/offset.
+        """
+        if not hasattr(self, '_paginator'):
+            if 'cursor' in self.request.query_params:
+                self._paginator = UserCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     @action(detail=False,
             methods=['get'],
             url_path='me',
@@ -48,10 +77,8 @@ class UserProfileViewSet(views.UserViewSet):
                                              data=request.data,
                                              partial=True)
             serializer.is_valid(raise_exception=True)
-
-            if user.avatar:
-                user.avatar.delete(save=True)
-
+            # Старый аватар удаляется после сохранения нового
+            # (см. image64conv.cleanup).
             serializer.save()
             return Response(
                 {'avatar': serializer.data['avatar']},
@@ -64,8 +91,8 @@ class UserProfileViewSet(views.UserViewSet):
                     {'detail': 'Аватар не существует!'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            user.avatar.delete(save=True)
-            user.save()
+            user.avatar = None
+            user.save(update_fields=['avatar'])
             return Response(
                 {'message': 'Аватар успешно удалён'},
                 status=status.HTTP_204_NO_CONTENT
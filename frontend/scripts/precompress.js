@@ -0,0 +1,40 @@
+// Создает .gz и .br копии файлов сборки, чтобы nginx отдавал их готовыми.
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const BUILD_DIR = path.join(__dirname, '..', 'build');
+const EXTENSIONS = ['.css', '.html', '.js', '.json', '.map', '.svg', '.txt', '.ico'];
+const MIN_SIZE = 1024;
+
+const compressors = [
+  ['.gz', (data) => zlib.gzipSync(data, { level: 9 })],
+  ['.br', (data) => zlib.brotliCompressSync(data, {
+    params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 11 },
+  })],
+];
+
+const walk = (dir) => fs.readdirSync(dir, { withFileTypes: true })
+  .flatMap((entry) => {
+    const fullPath = path.join(dir, entry.name);
+    return entry.isDirectory() ? walk(fullPath) : [fullPath];
+  });
+
+let created = 0;
+walk(BUILD_DIR)
+  .filter((file) => EXTENSIONS.includes(path.extname(file).toLowerCase()))
+  .forEach((file) => {
+    const data = fs.readFileSync(file);
+    if (data.length < MIN_SIZE) {
+      return;
+    }
+    compressors.forEach(([suffix, compress]) => {
+      const compressed = compress(data);
+      if (compressed.length < data.length) {
+        fs.writeFileSync(file + suffix, compressed);
+        created += 1;
+      }
+    });
+  });
+
+console.log(`Precompressed files created: ${created}`);